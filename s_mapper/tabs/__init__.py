@@ -1,9 +1,10 @@
 from .mappings import build_mappings_tab
-from .ping_log import build_ping_log_tab
+from .ping_log import build_ping_log_tab, create_ping_output_view
 from .macros import build_macros_tab
 
 __all__ = [
     'build_mappings_tab',
     'build_ping_log_tab',
+    'create_ping_output_view',
     'build_macros_tab',
 ]
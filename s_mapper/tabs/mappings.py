@@ -108,6 +108,8 @@ def build_mappings_tab(app):
     layout.addLayout(button_layout)
 
     app.mappings_listbox = QListWidget()
+    # all rows are single-line text; lets Qt skip per-item size queries
+    app.mappings_listbox.setUniformItemSizes(True)
     app.mappings_listbox.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
     app.mappings_listbox.customContextMenuRequested.connect(app._on_mappings_context_menu)
     layout.addWidget(app.mappings_listbox)
@@ -156,6 +158,7 @@ def build_mappings_tab(app):
     app.source_keyboard_combobox.currentTextChanged.connect(app.on_combobox_selected)
     app.window_selection_radio1.toggled.connect(app.update_window_selection_visibility)
     app.ip_monitor_toggle_button.toggled.connect(app.toggle_ip_monitoring)
+    app.ip_monitor_window_entry.textChanged.connect(app._on_ip_monitor_window_changed)
     app.click_interval_spinbox.valueChanged.connect(app._on_interval_changed)
 
     # Clipboard handling is connected centrally by the main UI initializer
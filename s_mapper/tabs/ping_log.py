@@ -1,15 +1,35 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QLabel
 
 
 def build_ping_log_tab(app):
-    """Create and attach the 'Ping Log' tab UI to the app instance."""
+    """Create and attach the 'Ping Log' tab UI to the app instance.
+
+    The log view itself is created on first use by
+    `create_ping_output_view`; until then the tab shows a placeholder.
+    """
     ping_log_tab = QWidget()
     app.tabs.addTab(ping_log_tab, "Ping Log")
     ping_log_layout = QVBoxLayout(ping_log_tab)
 
-    app.ping_output_view = QTextEdit()
-    app.ping_output_view.setReadOnly(True)
-    app.ping_output_view.setStyleSheet("background-color: #0d0d0d; color: #d4d4d4; font-family: 'Courier New', Courier, monospace;")
-    ping_log_layout.addWidget(app.ping_output_view)
+    app._ping_log_layout = ping_log_layout
+    app._ping_log_placeholder = QLabel("Ping results and macro messages will appear here.")
+    ping_log_layout.addWidget(app._ping_log_placeholder)
 
     return ping_log_tab
+
+
+def create_ping_output_view(app):
+    """Create the ping log QTextEdit, replacing the tab's placeholder."""
+    view = QTextEdit()
+    view.setReadOnly(True)
+    # Keep only the most recent lines so the log can't grow without bound
+    view.document().setMaximumBlockCount(2000)
+    view.setStyleSheet("background-color: #0d0d0d; color: #d4d4d4; font-family: 'Courier New', Courier, monospace;")
+
+    placeholder = getattr(app, '_ping_log_placeholder', None)
+    if placeholder is not None:
+        placeholder.hide()
+        placeholder.deleteLater()
+        app._ping_log_placeholder = None
+    app._ping_log_layout.addWidget(view)
+    return view
@@ -1,3 +1,6 @@
+import asyncio
+import contextlib
+import locale
 import subprocess
 import threading
 import logging
@@ -7,18 +10,107 @@ import re
 from PyQt6.QtCore import QThread, pyqtSignal
 from pynput import mouse, keyboard
 
-from .utils import parse_ping_output
+from .utils import parse_ping_output, format_ping_html
+
+# Raised by pynput's Controller.type() for characters it cannot map. Resolve
+# it once so a replaced/stubbed Controller does not break the lookup.
+_InvalidCharacterException = getattr(keyboard.Controller, 'InvalidCharacterException', Exception)
+
+# Modifier aliases accepted in "key:" macro actions
+_MOD_MAP = {
+    'ctrl': keyboard.Key.ctrl, 'control': keyboard.Key.ctrl,
+    'shift': keyboard.Key.shift, 'alt': keyboard.Key.alt,
+    'win': keyboard.Key.cmd, 'windows': keyboard.Key.cmd,
+    'cmd': keyboard.Key.cmd, 'meta': keyboard.Key.cmd,
+}
+# Named special keys (enter, tab, f5, ...) keyed by their lowercase name
+_SPECIAL_KEYS = {k.name: k for k in keyboard.Key}
+# Separator between the keys of a combo such as "ctrl + shift+n"
+_COMBO_SPLIT_RE = re.compile(r'\s*\+\s*')
+
+
+@contextlib.contextmanager
+def _held(controller, keys):
+    """Hold `keys` down for the duration of the block.
+
+    Like pynput's Controller.pressed(), but only needs press/release so any
+    controller-like object works. A key that fails to press is skipped (the
+    rest of the combo is still sent) and only keys actually pressed are
+    released, in reverse order.
+    """
+    pressed = []
+    try:
+        for k in keys:
+            try:
+                controller.press(k)
+            except Exception:
+                continue
+            pressed.append(k)
+        yield
+    finally:
+        for k in reversed(pressed):
+            try:
+                controller.release(k)
+            except Exception:
+                pass
+
+
+_controller_lock = threading.Lock()
+_shared_controller = None
 
 
-class KeyboardListenerThread(QThread):
+def shared_keyboard_controller():
+    """Return the process-wide pynput keyboard Controller.
+
+    Constructing a Controller sets up platform injection state, so it is
+    created lazily once and reused by the UI and macro threads.
+    """
+    global _shared_controller
+    with _controller_lock:
+        if _shared_controller is None:
+            _shared_controller = keyboard.Controller()
+        return _shared_controller
+
+
+class _RecorderHostMixin:
+    """Lets a MacroRecorder piggyback on an already running listener.
+
+    Callbacks are kept in a tuple that is replaced on every change, so the
+    listener thread can iterate it without taking the lock.
+    """
+    _recorders = ()
+    _recorders_lock = threading.Lock()
+
+    def add_recorder(self, cb):
+        with self._recorders_lock:
+            self._recorders = self._recorders + (cb,)
+
+    def remove_recorder(self, cb):
+        with self._recorders_lock:
+            self._recorders = tuple(r for r in self._recorders if r is not cb)
+
+    def _notify_recorders(self, *args):
+        for cb in self._recorders:
+            try:
+                cb(*args)
+            except Exception:
+                logging.debug("Recorder callback failed", exc_info=True)
+
+
+class KeyboardListenerThread(_RecorderHostMixin, QThread):
     """A QThread that runs the pynput keyboard listener."""
     def __init__(self, app_instance):
         super().__init__()
         self.app = app_instance
         self.listener = None
 
+    def on_press(self, key):
+        if self._recorders:
+            self._notify_recorders(key)
+        return self.app.on_press(key)
+
     def run(self):
-        self.listener = keyboard.Listener(on_press=self.app.on_press)
+        self.listener = keyboard.Listener(on_press=self.on_press)
         self.listener.start()
         self.listener.join()
 
@@ -29,14 +121,20 @@ class KeyboardListenerThread(QThread):
 
 class ActiveWindowEventThread(QThread):
     """Windows-only thread that registers a SetWinEventHook for foreground/focus
-    change (EVENT_SYSTEM_FOREGROUND). The callback runs on this thread and
+    change (EVENT_SYSTEM_FOREGROUND) and for title changes of the foreground
+    window (EVENT_OBJECT_NAMECHANGE). The callback runs on this thread and
     this class emits `active_window_changed` signal with the new title.
+
+    `hook_installed` is emitted once the hooks are in place so the app can
+    drop its polling fallback.
     """
     active_window_changed = pyqtSignal(str)
+    hook_installed = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self._hook = None
+        self._name_hook = None
         self._user32 = None
         self._stop_event = threading.Event()
 
@@ -54,6 +152,8 @@ class ActiveWindowEventThread(QThread):
 
         WINEVENT_OUTOFCONTEXT = 0x0000
         EVENT_SYSTEM_FOREGROUND = 0x0003
+        EVENT_OBJECT_NAMECHANGE = 0x800C
+        OBJID_WINDOW = 0
 
         WinEventProcType = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD,
                                              wintypes.HWND, wintypes.LONG,
@@ -67,14 +167,22 @@ class ActiveWindowEventThread(QThread):
             user32.GetWindowTextW(hwnd, buf, length + 1)
             return buf.value or ''
 
+        last_title = None
+
         @WinEventProcType
         def _callback(hWinEventHook, event, hwnd, idObject, idChild, dwEventThread, dwmsEventTime):
+            nonlocal last_title
             try:
-                if not hwnd:
-                    title = ''
-                else:
-                    title = _get_window_text(hwnd)
-                self.active_window_changed.emit((title or '').strip().lower())
+                # Only the foreground window itself; name changes of its
+                # child objects (and of background windows) arrive
+                # constantly. The cheap checks go first so most events
+                # never reach GetForegroundWindow.
+                if idObject != OBJID_WINDOW or not hwnd or hwnd != user32.GetForegroundWindow():
+                    return
+                title = (_get_window_text(hwnd) or '').strip().lower()
+                if title != last_title:
+                    last_title = title
+                    self.active_window_changed.emit(title)
             except Exception:
                 pass
 
@@ -84,6 +192,15 @@ class ActiveWindowEventThread(QThread):
             self._hook = hook
         except Exception:
             return
+        if not hook:
+            return
+        try:
+            self._name_hook = user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE,
+                                                     0, _callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+        except Exception:
+            self._name_hook = None
+        if self._name_hook:
+            self.hook_installed.emit()
 
         msg = wintypes.MSG()
         while not self._stop_event.is_set():
@@ -93,42 +210,123 @@ class ActiveWindowEventThread(QThread):
             else:
                 self.msleep(50)
 
-        try:
-            if self._hook:
-                user32.UnhookWinEvent(self._hook)
-                self._hook = None
-        except Exception:
-            pass
+        for attr in ('_hook', '_name_hook'):
+            try:
+                if getattr(self, attr):
+                    user32.UnhookWinEvent(getattr(self, attr))
+                    setattr(self, attr, None)
+            except Exception:
+                pass
 
     def stop(self):
         self._stop_event.set()
 
 
-class MouseListenerThread(QThread):
-    """A QThread that runs the pynput mouse listener."""
+class KeyInjectorThread(QThread):
+    """Sends remapped keys on behalf of the low-level keyboard hook.
+
+    The hook callback only queues `(name, action)`; this thread drains the
+    queue in small batches and calls `send(name)`, so a slow OS input queue
+    never stalls the hook itself. When `send` rejects a name (ValueError),
+    `send_failed` is emitted with the action so the app can fall back to its
+    controller path.
+    """
+    send_failed = pyqtSignal(object)
+    MAX_BATCH = 16
+
+    def __init__(self, send, parent=None):
+        super().__init__(parent=parent)
+        self._send = send
+        # SimpleQueue: unbounded, lock-free put from the hook thread
+        self._queue = queue.SimpleQueue()
+
+    def submit(self, name, action):
+        self._queue.put((name, action))
+
+    def run(self):
+        get, get_nowait = self._queue.get, self._queue.get_nowait
+        while True:
+            batch = [get()]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            for name, action in batch:
+                if name is None:
+                    # stop() sentinel
+                    return
+                try:
+                    self._send(name)
+                except ValueError:
+                    self.send_failed.emit(action)
+                except Exception:
+                    logging.debug("Key injection failed for %r", name, exc_info=True)
+
+    def stop(self):
+        self._queue.put((None, None))
+
+
+class MouseListenerThread(_RecorderHostMixin, QThread):
+    """A QThread that runs the pynput mouse listener.
+
+    Move callbacks only record the latest cursor position; `run()` emits
+    `mouse_moved` from it at most MOVE_EMIT_HZ times per second so a high
+    polling-rate mouse doesn't flood the GUI thread with queued signals.
+    """
     mouse_moved = pyqtSignal(int, int)
+    MOVE_EMIT_HZ = 60
 
     def __init__(self, app_instance):
         super().__init__()
         self.app = app_instance
         self.listener = None
+        self._last_xy = None
+        self._moved = threading.Event()
+        self._stop_event = threading.Event()
 
     def on_move(self, x, y):
-        self.mouse_moved.emit(x, y)
+        self._last_xy = (x, y)
+        self._moved.set()
+
+    def on_click(self, x, y, button, pressed):
+        if self._recorders:
+            self._notify_recorders(x, y, button, pressed)
+        return self.app.on_click(x, y, button, pressed)
 
     def run(self):
         self.listener = mouse.Listener(
-            on_click=self.app.on_click,
+            on_click=self.on_click,
             on_move=self.on_move
         )
         self.listener.start()
+
+        interval_ms = int(1000 / self.MOVE_EMIT_HZ)
+        while not self._stop_event.is_set() and self.listener.is_alive():
+            if not self._moved.wait(0.5):
+                continue
+            self._moved.clear()
+            xy = self._last_xy
+            if xy is not None and not self._stop_event.is_set():
+                self.mouse_moved.emit(*xy)
+            self.msleep(interval_ms)
+
+        self.listener.stop()
         self.listener.join()
 
     def stop(self):
+        self._stop_event.set()
+        self._moved.set()
         if self.listener:
             self.listener.stop()
 
 
+def _ping_command(ip_address):
+    # -w bounds each echo wait (ms) so unreachable hosts don't take the
+    # default 4 s per request; -4 since we only ping IPv4 literals
+    return ['ping', '-4', '-n', '4', '-w', '1000', ip_address]
+
+
 class PingThread(QThread):
     ping_result = pyqtSignal(str, str)
 
@@ -141,7 +339,7 @@ class PingThread(QThread):
     def run(self):
         output = ""
         try:
-            cmd = ['ping', '-n', '4', self.ip_address]
+            cmd = _ping_command(self.ip_address)
             self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
                                           creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
             try:
@@ -175,6 +373,134 @@ class PingThread(QThread):
             pass
 
 
+class PingManager(QThread):
+    """Runs every ping on one asyncio event loop in a single thread.
+
+    `ping()` may be called from any thread; the ping subprocesses run
+    concurrently. Each result is escaped and formatted here, off the GUI
+    thread, and emitted through `ping_html` as (color, html_fragment).
+    """
+    ping_html = pyqtSignal(str, str)
+    PING_TIMEOUT = 10
+    # ping subprocesses allowed to run at once; further pings wait their turn
+    MAX_CONCURRENT = 3
+
+    def __init__(self):
+        super().__init__()
+        self._loop = None
+        self._slots = None
+        self._ready = threading.Event()
+        self._procs = set()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.MAX_CONCURRENT)
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            except Exception:
+                pass
+            self._loop = None
+            loop.close()
+
+    def ping(self, ip_address):
+        """Schedule a ping; returns False if the loop is not running.
+
+        Called on the GUI thread, so it never waits for the loop to come up;
+        the caller falls back to a PingThread instead.
+        """
+        if not self._ready.is_set():
+            return False
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            asyncio.run_coroutine_threadsafe(self._ping(ip_address), loop)
+        except RuntimeError:
+            return False
+        return True
+
+    async def _ping(self, ip_address):
+        async with self._slots:
+            await self._run_ping(ip_address)
+
+    async def _run_ping(self, ip_address):
+        output = ""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *_ping_command(ip_address),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            self._procs.add(proc)
+            try:
+                out, _ = await asyncio.wait_for(proc.communicate(), self.PING_TIMEOUT)
+            except asyncio.TimeoutError:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+                await proc.wait()
+                self._emit(ip_address, 'red', 'Ping command timed out.')
+                return
+            except asyncio.CancelledError:
+                # Shutting down (_shutdown has killed it): reap the process
+                # so its transport is closed before the loop is
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+                await proc.wait()
+                raise
+            finally:
+                self._procs.discard(proc)
+
+            # match the decoding Popen(text=True) used in PingThread
+            output = out.decode(locale.getpreferredencoding(False), errors='replace')
+            output = output.replace('\r\n', '\n')
+            _, color = parse_ping_output(output)
+            self._emit(ip_address, color, output)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception("Ping failed")
+            self._emit(ip_address, 'red', output or f"Ping command failed for {ip_address}")
+
+    def _emit(self, ip_address, color, output):
+        self.ping_html.emit(color, format_ping_html(ip_address, color, output))
+
+    def _shutdown(self):
+        for proc in list(self._procs):
+            try:
+                proc.kill()
+            except Exception:
+                pass
+        self._loop.stop()
+
+    def stop(self):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._shutdown)
+        except RuntimeError:
+            # loop already closed
+            pass
+
+
+# MacroThread._state bits
+_MACRO_STOP = 1
+_MACRO_ABORT = 2
+
+
 class MacroThread(QThread):
     """Background thread that executes queued macros.
 
@@ -188,22 +514,44 @@ class MacroThread(QThread):
       - 'sleep:<seconds>' -> sleeps for given seconds
 
     The thread exposes a simple queue interface via `enqueue_macro()`.
+    At most MAX_PENDING macros are queued; the oldest is dropped when full.
+    When `coalesce_repeats` is set, a macro is not queued again while the
+    same macro (by id) is already the last one waiting, so a held hotkey's
+    auto-repeat doesn't pile up copies.
     """
     macro_log = pyqtSignal(str)
-
-    def __init__(self, app=None):
+    MAX_PENDING = 64
+    coalesce_repeats = False
+    # Emit "Starting macro" as well as "Finished macro". Off by default: the
+    # app already logs when it queues a macro, and each emit is a queued
+    # cross-thread call into the GUI.
+    verbose_log = False
+    # pause after each character typed through the press/release fallback
+    char_delay = 0.02
+    # longer pause after 'enter' so the target app finishes the new line
+    after_enter_delay = 0.12
+
+    def __init__(self, app=None, private_controller=False):
         super().__init__()
-        self._queue = queue.Queue()
-        self._stop_event = threading.Event()
-        # event to request aborting the currently executing macro
-        self._current_abort = threading.Event()
+        self._queue = queue.Queue(maxsize=self.MAX_PENDING)
+        # Control state: _MACRO_STOP ends the thread, _MACRO_ABORT ends the
+        # current macro. Reads are plain int loads; writes take the lock.
+        self._state = 0
+        self._state_lock = threading.Lock()
+        # set whenever a state bit is raised so waits inside a macro wake
+        # immediately
+        self._wake = threading.Event()
         # Optional app reference used to mark the app while a macro is executing
         # so mapping handlers can avoid re-triggering during synthetic input.
         self.app = app
 
         try:
-            # reuse the module-level keyboard helper which is a module in this file
-            self._controller = keyboard.Controller()
+            # Share the process-wide controller unless the caller asks for
+            # a dedicated one
+            if private_controller:
+                self._controller = keyboard.Controller()
+            else:
+                self._controller = shared_keyboard_controller()
         except Exception:
             self._controller = None
 
@@ -211,11 +559,33 @@ class MacroThread(QThread):
         """Add a macro dict to the internal queue."""
         if not isinstance(macro, dict):
             return
+        if self.coalesce_repeats and self._is_last_pending(macro):
+            return
         # Copy and expand any "x N" repeat syntax (e.g. "key:tab x 15")
         expanded = self._expand_actions(macro.get('actions', []) or [])
         macro_copy = dict(macro)
         macro_copy['actions'] = expanded
-        self._queue.put(macro_copy)
+        # Parse once here so playback doesn't re-tokenize every action
+        macro_copy['_ops'] = self._compile_macro(expanded)
+        while True:
+            try:
+                self._queue.put_nowait(macro_copy)
+                return
+            except queue.Full:
+                # drop the oldest pending macro to make room
+                try:
+                    dropped = self._queue.get_nowait()
+                    logging.warning("Macro queue full; dropped %r", dropped.get('name', '<unnamed>'))
+                except queue.Empty:
+                    pass
+
+    def _is_last_pending(self, macro):
+        macro_id = macro.get('id')
+        if macro_id is None:
+            return False
+        with self._queue.mutex:
+            pending = self._queue.queue
+            return bool(pending) and pending[-1].get('id') == macro_id
 
     def _expand_actions(self, actions):
         """Expand repeat shorthand like "key:tab x 15" into individual actions."""
@@ -248,187 +618,192 @@ class MacroThread(QThread):
 
         return [act]
 
-    def run(self):
-        while not self._stop_event.is_set():
+    def _type_chars(self, text):
+        """Type ``text`` one character at a time.
+
+        Characters are still sent through ``controller.type``; only those the
+        controller rejects fall back to press/release followed by
+        ``char_delay``.
+        """
+        char_delay = self.char_delay
+        # bind hot-loop lookups once per call
+        controller = self._controller
+        type_, press, release = controller.type, controller.press, controller.release
+        mark, sleep = self._mark_injected, time.sleep
+        for ch in text:
+            mark()
             try:
-                macro = self._queue.get(timeout=0.5)
-            except queue.Empty:
+                type_(ch)
                 continue
+            except _InvalidCharacterException:
+                pass
+            try:
+                press(ch)
+                release(ch)
+            except Exception:
+                logging.debug("Unable to type character %r", ch)
+            sleep(char_delay)
 
-            name = macro.get('name', '<unnamed>')
-            actions = macro.get('actions', []) or []
+    def _compile_macro(self, actions):
+        """Parse a list of action strings into ``(kind, *args)`` tuples.
+
+        Parsing happens once per enqueue so `run()` only dispatches on the
+        pre-resolved tuples. Supported kinds are 'text', 'sleep', 'key',
+        'combo' and 'unknown' (anything we cannot interpret).
+        """
+        ops = []
+        for act in actions:
+            if not isinstance(act, str):
+                ops.append(('unknown', act))
+                continue
+            prefix, sep, payload = act.partition(':')
+            if not sep:
+                ops.append(('unknown', act))
+            elif prefix == 'sleep':
+                try:
+                    ops.append(('sleep', float(payload)))
+                except ValueError:
+                    logging.warning("Invalid sleep action in macro: %r", act)
+            elif prefix == 'text':
+                ops.append(('text', payload))
+            elif prefix == 'key':
+                keyname = payload
+                # support modifier + main key combos like "ctrl + n"
+                parts = [p for p in _COMBO_SPLIT_RE.split(keyname.strip()) if p]
+                # Normalize parts so we accept variations like 'Key.tab', '"tab"' or "'tab'"
+                resolved = []
+                for p in parts:
+                    qp = p.strip('"\'').lower()
+                    if qp.startswith('key.'):
+                        qp = qp[4:]
+                    resolved.append(_MOD_MAP.get(qp) or _SPECIAL_KEYS.get(qp, qp))
+                # longer pause after 'enter' or newline keys to make sure the
+                # target app processes the newline (helps Notepad insert a
+                # complete new line)
+                after_enter = keyname in ('enter', '\n')
+                if not resolved:
+                    # nothing left after splitting (e.g. "key:+"); type the
+                    # payload literally as the per-key path always has
+                    ops.append(('text', keyname))
+                elif len(resolved) > 1:
+                    ops.append(('combo', resolved[:-1], resolved[-1], after_enter))
+                else:
+                    ops.append(('key', resolved[0], after_enter))
+            else:
+                ops.append(('unknown', act))
+        return ops
+
+    def _mark_injected(self):
+        # Stamp the app so its input handlers can tell our synthetic events
+        # from real user input
+        app = self.app
+        if app is not None:
+            app._last_injected_event_time = time.time()
+
+    def _run_sleep(self, sec):
+        # A single timed wait; stop/abort requests wake it immediately
+        if sec > 0:
+            self._wake.wait(sec)
+
+    def _run_text(self, text):
+        # mark that we're about to inject synthetic input
+        self._mark_injected()
+        try:
+            # Send the full text payload in one batch; the per-character
+            # path only handles the characters the controller cannot map.
+            self._controller.type(text)
+        except _InvalidCharacterException as e:
+            # pynput reports the offending index; everything before it has
+            # already been typed.
+            idx = e.args[0] if e.args and isinstance(e.args[0], int) else 0
+            self._type_chars(text[idx:])
+
+    def _run_key(self, key, after_enter):
+        self._mark_injected()
+        try:
+            self._controller.press(key)
+            self._controller.release(key)
+        except Exception:
             try:
-                self.macro_log.emit(f"Starting macro: {name}")
+                self._controller.type(str(key))
             except Exception:
                 pass
+        if after_enter:
+            time.sleep(self.after_enter_delay)
 
-            # mark app as running a macro while we execute to prevent
-            # mappings from being triggered by our synthetic events
-            if getattr(self, 'app', None):
+    def _run_combo(self, modifiers, main, after_enter):
+        # One timestamp covers the whole combo; it completes well inside
+        # the synthetic-input grace window.
+        self._mark_injected()
+        try:
+            # modifiers are released in reverse order even if the main key fails
+            with _held(self._controller, modifiers):
                 try:
-                    self.app._macro_running = True
+                    self._controller.press(main)
+                    self._controller.release(main)
+                except Exception:
+                    self._controller.type(str(main))
+        except Exception:
+            logging.debug("Unable to send key combo %r + %r", modifiers, main)
+        if after_enter:
+            time.sleep(self.after_enter_delay)
+
+    def run(self):
+        # Input-producing handlers are skipped when no controller is available.
+        handlers = {'sleep': self._run_sleep}
+        if self._controller:
+            handlers.update({'text': self._run_text, 'key': self._run_key, 'combo': self._run_combo})
+
+        while not self._state & _MACRO_STOP:
+            try:
+                macro = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            name = macro.get('name', '<unnamed>')
+            ops = macro.get('_ops')
+            if ops is None:
+                ops = self._compile_macro(macro.get('actions', []) or [])
+            if self.verbose_log:
+                try:
+                    self.macro_log.emit(f"Starting macro: {name}")
                 except Exception:
                     pass
 
-            # clear any previous abort requests for this macro
-            self._current_abort.clear()
+            # mark app as running a macro while we execute to prevent
+            # mappings from being triggered by our synthetic events
+            app = self.app
+            if app is not None:
+                app._macro_running = True
 
-            for act in actions:
-                if self._stop_event.is_set() or self._current_abort.is_set():
+            # clear any previous abort requests for this macro
+            with self._state_lock:
+                self._state &= ~_MACRO_ABORT
+                if not self._state:
+                    self._wake.clear()
+
+            wait = self._wake.wait
+            get_handler = handlers.get
+            for op in ops:
+                # any bit set means stop or abort
+                if self._state:
                     break
                 try:
-                    if isinstance(act, str) and act.startswith('sleep:'):
-                        sec = float(act.split(':', 1)[1]) if ':' in act else 0.1
-                        # Sleep in short increments so abort requests can be noticed
-                        waited = 0.0
-                        step = 0.05
-                        while waited < sec:
-                            if self._stop_event.is_set() or self._current_abort.is_set():
-                                break
-                            to_sleep = min(step, sec - waited)
-                            time.sleep(to_sleep)
-                            waited += to_sleep
-                    if isinstance(act, str) and act.startswith('text:'):
-                        text = act.split(':', 1)[1]
-                        if self._controller:
-                            try:
-                                # Use the controller.type API to send the full
-                                # text payload in one operation where possible.
-                                # This is simpler for end-users and matches the
-                                # tests which expect 'type' events per text action.
-                                try:
-                                    # mark that we're about to inject synthetic input
-                                    try:
-                                        if getattr(self, 'app', None):
-                                            setattr(self.app, '_last_injected_event_time', time.time())
-                                    except Exception:
-                                        pass
-                                    self._controller.type(text)
-                                except Exception:
-                                    # Fallback: try character-by-character with
-                                    # a short delay between characters.
-                                    char_delay = getattr(self, 'char_delay', 0.02)
-                                    for ch in text:
-                                        try:
-                                            if getattr(self, 'app', None):
-                                                setattr(self.app, '_last_injected_event_time', time.time())
-                                        except Exception:
-                                            pass
-                                        try:
-                                            self._controller.press(ch)
-                                            self._controller.release(ch)
-                                        except Exception:
-                                            try:
-                                                self._controller.type(ch)
-                                            except Exception:
-                                                pass
-                                        try:
-                                            time.sleep(char_delay)
-                                        except Exception:
-                                            pass
-                            except Exception:
-                                pass
-                    elif isinstance(act, str) and act.startswith('key:'):
-                        keyname = act.split(':', 1)[1]
-                        if self._controller:
-                            try:
-                                # support modifier + main key combos like "ctrl + n"
-                                parts = [p.strip() for p in keyname.replace(' + ', '+').split('+') if p.strip()]
-                                # Normalize parts so we accept variations like 'Key.tab', '"tab"' or "'tab'"
-                                norm_parts = []
-                                for p in parts:
-                                    qp = p.strip().strip('"\'').lower()
-                                    # Accept tokens of the form Key.tab by stripping the prefix
-                                    if qp.lower().startswith('key.'):
-                                        qp = qp.split('.', 1)[1]
-                                    norm_parts.append(qp)
-
-                                parts = norm_parts
-
-                                # Map modifier names to Key enum where possible
-                                mod_map = {'ctrl': keyboard.Key.ctrl, 'control': keyboard.Key.ctrl, 'shift': keyboard.Key.shift, 'alt': keyboard.Key.alt,
-                                           'win': keyboard.Key.cmd, 'windows': keyboard.Key.cmd, 'cmd': keyboard.Key.cmd, 'meta': keyboard.Key.cmd}
-
-                                # Resolve parts into Key objects or literal chars
-                                resolved = [getattr(keyboard.Key, p, p) for p in parts]
-
-                                # If there are modifiers, press them first then press the final key
-                                if len(resolved) > 1:
-                                    modifiers = resolved[:-1]
-                                    main = resolved[-1]
-                                    # press modifiers
-                                    for m in modifiers:
-                                        try:
-                                            if getattr(self, 'app', None):
-                                                setattr(self.app, '_last_injected_event_time', time.time())
-                                        except Exception:
-                                            pass
-                                        try:
-                                            self._controller.press(m)
-                                        except Exception:
-                                            pass
-                                    # press main
-                                    try:
-                                        if getattr(self, 'app', None):
-                                            setattr(self.app, '_last_injected_event_time', time.time())
-                                        self._controller.press(main)
-                                        self._controller.release(main)
-                                    except Exception:
-                                        try:
-                                            self._controller.type(str(main))
-                                        except Exception:
-                                            pass
-                                    # release modifiers in reverse order
-                                    for m in reversed(modifiers):
-                                        try:
-                                            self._controller.release(m)
-                                        except Exception:
-                                            pass
-                                else:
-                                    # single key
-                                    k = resolved[0]
-                                    try:
-                                        if getattr(self, 'app', None):
-                                            setattr(self.app, '_last_injected_event_time', time.time())
-                                        self._controller.press(k)
-                                        self._controller.release(k)
-                                    except Exception:
-                                        try:
-                                            self._controller.type(str(k))
-                                        except Exception:
-                                            pass
-                                # longer pause after 'enter' or newline keys to
-                                # make sure the target app processes the newline
-                                # (helps Notepad insert a complete new line)
-                                try:
-                                    if keyname in ('enter', '\n'):
-                                        time.sleep(getattr(self, 'after_enter_delay', 0.12))
-                                except Exception:
-                                    pass
-                            except Exception:
-                                try:
-                                    self._controller.type(keyname)
-                                except Exception:
-                                    pass
-                    else:
+                    kind = op[0]
+                    if kind == 'unknown':
                         # Unknown action — treat as a small delay to be safe
-                        time.sleep(0.05)
+                        wait(0.05)
+                    else:
+                        handler = get_handler(kind)
+                        if handler:
+                            handler(*op[1:])
 
                     # Small post-action delay to give target applications (e.g.
                     # Notepad) time to process injected events before the next
                     # action begins. This helps avoid dropped characters and
-                    # missed Enter presses on some systems.
-                    try:
-                        # allow aborts to be detected during this short wait as well
-                        waited = 0.0
-                        tiny_step = 0.02
-                        while waited < 0.05:
-                            if self._stop_event.is_set() or self._current_abort.is_set():
-                                break
-                            time.sleep(tiny_step)
-                            waited += tiny_step
-                    except Exception:
-                        pass
+                    # missed Enter presses on some systems. Aborts still wake
+                    # the wait immediately.
+                    wait(0.05)
                 except Exception:
                     logging.exception("Macro action failed")
 
@@ -438,11 +813,8 @@ class MacroThread(QThread):
                 pass
 
             # clear running flag
-            if getattr(self, 'app', None):
-                try:
-                    self.app._macro_running = False
-                except Exception:
-                    pass
+            if app is not None:
+                app._macro_running = False
 
     def abort_current_macro(self):
         """Request that the currently executing macro be aborted immediately.
@@ -451,13 +823,14 @@ class MacroThread(QThread):
         currently running macro and lets the thread continue to the next
         queued item (if any).
         """
-        try:
-            self._current_abort.set()
-        except Exception:
-            pass
+        with self._state_lock:
+            self._state |= _MACRO_ABORT
+        self._wake.set()
 
     def stop(self):
-        self._stop_event.set()
+        with self._state_lock:
+            self._state |= _MACRO_STOP
+        self._wake.set()
         # drain the queue so we don't attempt further work
         try:
             while True:
@@ -470,23 +843,38 @@ class MacroRecorder(QThread):
     """Records a short sequence of keyboard events (and simple mouse clicks).
 
     Emits recorded signal with a list of action strings when recording stops.
+    When the app's running KeyboardListenerThread/MouseListenerThread are
+    passed in, the recorder attaches to them instead of installing its own
+    low-level hooks.
     """
     recorded = pyqtSignal(list)
 
-    def __init__(self, include_mouse=False):
+    def __init__(self, include_mouse=False, keyboard_thread=None, mouse_thread=None):
         super().__init__()
         self.include_mouse = include_mouse
+        self.keyboard_thread = keyboard_thread
+        self.mouse_thread = mouse_thread
         self._stop_event = threading.Event()
+        # (host thread, callback) pairs we are attached to; guarded so a
+        # listener restart can move them while recording is in progress
+        self._hosts = []
+        self._hosts_lock = threading.Lock()
+
+    def reattach(self, old_host, new_host):
+        """Move our callbacks from a listener thread that was replaced to
+        its successor (see KeyMapperApp._ensure_input_listeners)."""
+        with self._hosts_lock:
+            for i, (host, cb) in enumerate(self._hosts):
+                if host is old_host:
+                    old_host.remove_recorder(cb)
+                    new_host.add_recorder(cb)
+                    self._hosts[i] = (new_host, cb)
+            if self.keyboard_thread is old_host:
+                self.keyboard_thread = new_host
+            if self.mouse_thread is old_host:
+                self.mouse_thread = new_host
 
     def run(self):
-        try:
-            from pynput import keyboard as _kbd
-            from pynput import mouse as _mouse
-        except Exception:
-            # Not available in this environment — nothing to record
-            self.recorded.emit([])
-            return
-
         actions = []
         last_time = None
 
@@ -504,7 +892,7 @@ class MacroRecorder(QThread):
             try:
                 t = time.time()
                 _maybe_sleep(t)
-                if isinstance(key, _kbd.KeyCode):
+                if isinstance(key, keyboard.KeyCode):
                     ch = getattr(key, 'char', None)
                     if ch:
                         actions.append(f"text:{ch}")
@@ -535,31 +923,44 @@ class MacroRecorder(QThread):
             if self._stop_event.is_set():
                 return False
 
-        # Use listeners; they block until stopped via return False
-        k_listener = _kbd.Listener(on_press=on_press)
-        if self.include_mouse:
-            m_listener = _mouse.Listener(on_click=on_click)
-        else:
-            m_listener = None
-
-        k_listener.start()
-        if m_listener:
-            m_listener.start()
-
-        # Wait until stop event is set
-        while not self._stop_event.is_set():
-            self.msleep(50)
-
-        # Ensure listeners stopped
-        try:
-            k_listener.stop()
-        except Exception:
-            pass
-        try:
-            if m_listener:
-                m_listener.stop()
-        except Exception:
-            pass
+        # Prefer attaching to the listeners that are already running; only
+        # fall back to dedicated pynput listeners when none is available.
+        k_listener = m_listener = None
+        with self._hosts_lock:
+            if self.keyboard_thread is not None and self.keyboard_thread.isRunning():
+                self.keyboard_thread.add_recorder(on_press)
+                self._hosts.append((self.keyboard_thread, on_press))
+            else:
+                k_listener = keyboard.Listener(on_press=on_press)
+                k_listener.start()
+            if self.include_mouse:
+                if self.mouse_thread is not None and self.mouse_thread.isRunning():
+                    self.mouse_thread.add_recorder(on_click)
+                    self._hosts.append((self.mouse_thread, on_click))
+                else:
+                    m_listener = mouse.Listener(on_click=on_click)
+                    m_listener.start()
+
+        # Block until stop() is called; callbacks run on the listener threads
+        self._stop_event.wait()
+
+        # Detach from whichever threads host us now; a restart may have
+        # moved us since we attached
+        with self._hosts_lock:
+            for host, cb in self._hosts:
+                host.remove_recorder(cb)
+            self._hosts = []
+
+        # Ensure our own listeners stopped and their threads have exited
+        # before we hand the recorded actions over
+        for listener in (k_listener, m_listener):
+            if listener is None:
+                continue
+            try:
+                listener.stop()
+                listener.join(1.0)
+            except Exception:
+                pass
 
         self.recorded.emit(actions)
 
@@ -2,18 +2,20 @@ import sys
 import os
 import time
 import configparser
-import re
+import ctypes
+import functools
 import logging
-import html
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QMessageBox,
     QSystemTrayIcon, QMenu, QTabWidget, QMainWindow
 )
-from PyQt6.QtCore import pyqtSignal, QMutex, QMutexLocker, QTimer, QEvent
-from PyQt6.QtGui import QCursor, QIcon, QAction, QTextCursor
+from PyQt6.QtCore import (
+    pyqtSignal, QReadWriteLock, QReadLocker, QWriteLocker,
+    QTimer, QEvent, QPoint
+)
+from PyQt6.QtGui import QCursor, QAction, QTextCursor
 from pynput import keyboard
-import threading
 try:
     import pygetwindow as gw
 except Exception:
@@ -29,10 +31,13 @@ except Exception:
     gw = _GWStub()
 from pynput.keyboard import Key
 
-from .utils import resource_path
-from .threads import KeyboardListenerThread, ActiveWindowEventThread, MacroRecorder, MouseListenerThread, PingThread, MacroThread
-from .widgets import HelpWindow, PingStatusLabel
-from .tabs import build_mappings_tab, build_ping_log_tab, build_macros_tab
+from .utils import is_ipv4, format_ping_html
+from .threads import (
+    KeyboardListenerThread, ActiveWindowEventThread, KeyInjectorThread, MacroRecorder, MouseListenerThread, PingThread, PingManager, MacroThread,
+    shared_keyboard_controller, _MOD_MAP
+)
+from .widgets import HelpWindow, PingStatusLabel, app_icon
+from .tabs import build_mappings_tab, build_ping_log_tab, build_macros_tab, create_ping_output_view
 
 # Optional low-level keyboard interception via the 'keyboard' package.
 # Import at module-level so all methods in this module can reference `kbd`.
@@ -44,6 +49,271 @@ except Exception:
     _KBD_AVAILABLE = False
 
 
+# Keys offered in the source/target/macro key comboboxes
+_KEYBOARD_KEYS = (
+    '', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
+    'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
+    '1', '2', '3', '4', '5', '6', '7', '8', '9', '0',
+    'enter', 'esc', 'space', 'shift', 'ctrl', 'alt', 'tab', 'backspace', 'delete',
+    'up', 'down', 'left', 'right',
+    'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
+    '!', '@', '#', '$', '%', '^', '&', '*', '(', ')', '-', '=', '[', ']', '\\',
+    ';', "'", ',', '.', '/', '`', '~', '{', '}', '|', ':', '"', '<', '>', '?',
+    '§', '´', '¨', '±', 'ä', 'å', 'ö', 'ø', 'æ',
+)
+
+# Function-key names ('f1'..'f24') that mouse mappings store as pynput Keys
+_FN_KEY_OBJS = {name: getattr(Key, name) for name in (f'f{i}' for i in range(1, 25)) if hasattr(Key, name)}
+
+
+# Dark mode stylesheet for the main window
+_DARK_QSS = """
+QWidget {
+    background-color: #1e1e1e;
+    color: #d4d4d4;
+    font-size: 10pt;
+}
+QScrollArea {
+    border: none;
+}
+QComboBox {
+    background-color: #252526;
+    border: 1px solid #3a3d41;
+    padding: 5px;
+    selection-background-color: #007acc;
+}
+QComboBox QAbstractItemView {
+    background-color: #252526;
+    selection-background-color: #007acc;
+    border: 1px solid #3a3d41;
+}
+QComboBox::drop-down {
+    border: none;
+}
+QLineEdit {
+    background-color: #252526;
+    border: 1px solid #3a3d41;
+    padding: 5px;
+    selection-background-color: #007acc;
+}
+QPushButton {
+    background-color: #3a3d41;
+    color: #ffffff;
+    border: none;
+    padding: 8px 16px;
+}
+QPushButton:hover {
+    background-color: #4a4d51;
+}
+QPushButton:pressed {
+    background-color: #007acc;
+}
+QListWidget {
+    background-color: #252526;
+    border: 1px solid #3a3d41;
+    selection-background-color: #007acc;
+}
+QRadioButton {
+    color: #888888;
+}
+"""
+
+
+@functools.lru_cache(maxsize=16)
+def _indicator_style(color):
+    """Stylesheet for the round ping status indicator in ``color``."""
+    return f"background-color: {color}; border-radius: 10px;"
+
+
+def _append_ping_html(view, fragments):
+    """Append ping result HTML fragments to the end of the ping log view
+    with a single insertHtml call."""
+    # Prepend a newline if there's already content. document().isEmpty()
+    # avoids copying the whole log out as a string on every ping.
+    document = getattr(view, 'document', None)
+    has_content = not document().isEmpty() if document else bool(view.toPlainText())
+    leading_br = "<br>" if has_content else ""
+    cursor = view.textCursor()
+    cursor.movePosition(QTextCursor.MoveOperation.End)
+    view.setTextCursor(cursor)
+    view.insertHtml(leading_br + "<br>".join(fragments))
+
+
+# Most ping results held back while the Ping Log tab is not on screen
+_PING_HIDDEN_BACKLOG = 500
+
+
+def _macro_trigger_details(macro):
+    """Return the mapping details that fire ``macro`` from its trigger."""
+    details = {'type': 'macro', 'macro_id': macro['id'], 'window_title': macro['window_title']}
+    if macro['trigger_type'] == 'keyboard':
+        details['source_key'] = macro['source_key']
+    else:
+        details['mouse_button'] = macro['mouse_button']
+        details['press_count'] = macro['press_count']
+    return details
+
+
+def _user_config_path(filename):
+    """Return the path of ``filename`` in the per-user S-Mapper folder,
+    creating the folder if needed (falls back to the working directory)."""
+    app_data_path = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r"~\AppData\Local")
+    config_dir = os.path.join(app_data_path, 'S-Mapper')
+    try:
+        os.makedirs(config_dir, exist_ok=True)
+    except Exception:
+        return filename
+    return os.path.join(config_dir, filename)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_target(target):
+    """Split a mapping target like ``'ctrl + alt + d'`` into
+    ``(modifier_keys, key_to_press)``.
+
+    Targets are fixed when a mapping is saved, so the parse is cached per
+    string and a fired mapping only has to press the keys.
+    """
+    parts = [p.strip() for p in target.replace(' + ', '+').split('+')]
+    main_key = parts[-1]
+    modifiers = [m.lower() for m in parts[:-1] if m]
+    modifier_keys = tuple(_MOD_MAP[m] for m in modifiers if m in _MOD_MAP)
+    return modifier_keys, getattr(Key, main_key, main_key)
+
+
+@functools.lru_cache(maxsize=256)
+def _kbd_send_name(target):
+    """Return ``target`` in the 'keyboard' package's send() format,
+    e.g. ``'ctrl + alt + d'`` -> ``'ctrl+alt+d'``."""
+    if isinstance(target, Key):
+        return target.name
+    # Convert space-padded "ctrl + alt + d" -> "ctrl+alt+d"
+    return str(target).replace(' + ', '+').replace(' ', '')
+
+
+# user32 handle for _foreground_title(); None until first use, False off Windows
+_user32 = None
+
+
+def _foreground_title():
+    """Return the title of the foreground window ('' if there is none).
+
+    On Windows this is GetForegroundWindow + GetWindowTextW through ctypes,
+    which skips building a pygetwindow Window object on every poll. Other
+    platforms go through pygetwindow.
+    """
+    global _user32
+    if _user32 is None:
+        try:
+            _user32 = ctypes.windll.user32
+        except Exception:
+            _user32 = False
+    if not _user32:
+        w = gw.getActiveWindow()
+        # pygetwindow re-queries Win32 on every .title access; read it once
+        return (w.title or "") if w else ""
+    hwnd = _user32.GetForegroundWindow()
+    length = _user32.GetWindowTextLengthW(hwnd) if hwnd else 0
+    if length <= 0:
+        return ""
+    buf = ctypes.create_unicode_buffer(length + 1)
+    _user32.GetWindowTextW(hwnd, buf, length + 1)
+    return buf.value or ""
+
+
+# Entries in the low-level hook's ignore map expire after ~0.25 s, so only a
+# handful are ever live; the cap just stops stale ones piling up.
+_KBD_IGNORE_MAX = 256
+
+
+def _kbd_ignore_name(ignore, name, expiry):
+    """Ignore ``name`` in the low-level hook until ``expiry`` (time.monotonic()).
+
+    Re-inserting moves the key to the end, so the dict stays ordered oldest
+    first and overflow evicts the stalest entry without a full sweep.
+    """
+    ignore.pop(name, None)
+    ignore[name] = expiry
+    if len(ignore) > _KBD_IGNORE_MAX:
+        del ignore[next(iter(ignore))]
+
+
+def _build_trigger_indexes(mappings):
+    """Index mappings by their lowercased trigger so the input listeners
+    don't have to walk every mapping on each event.
+
+    Returns ``(kbd_index, mouse_index)``: ``kbd_index`` maps a source key to
+    a list of ``(window, action)`` and ``mouse_index`` maps a mouse button to
+    a list of ``(window, press_count, action)``. Window titles are stored
+    lowercased and stripped; list order follows the mapping order so the
+    first match wins just like a linear scan.
+    """
+    kbd_index = {}
+    mouse_index = {}
+    for window_title, group in mappings.items():
+        window = (window_title or '').strip().lower()
+        for details in group.values():
+            if not details:
+                continue
+            is_macro = details.get('type') == 'macro'
+            if 'source_key' in details and window:
+                source_key = (details.get('source_key') or '').lower().strip()
+                action = details if is_macro else details.get('target_key')
+                kbd_index.setdefault(source_key, []).append((window, action))
+            if 'mouse_button' in details:
+                button = (details['mouse_button'] or '').lower().strip()
+                action = details if is_macro else details.get('keyboard_button')
+                mouse_index.setdefault(button, []).append(
+                    (window, details.get('press_count'), action))
+    return kbd_index, mouse_index
+
+
+def _source_keys_by_window(source_index):
+    """Invert a ``source_key -> [(window, action)]`` index into
+    ``window -> frozenset(source_keys)``, skipping empty window titles."""
+    by_window = {}
+    for sk, bucket in source_index.items():
+        for w_title, _ in bucket:
+            if w_title:
+                by_window.setdefault(w_title, set()).add(sk)
+    return {w: frozenset(keys) for w, keys in by_window.items()}
+
+
+def _render_display(details, window):
+    """Return the mappings list text for ``details`` under ``window``.
+
+    The text is formatted once and cached on the details dict (edits always
+    install a fresh dict), so refreshing the list doesn't re-format every
+    mapping. The cache key is underscore-prefixed and never persisted.
+    """
+    text = details.get('_display_text')
+    if text is not None:
+        return text
+
+    text = ""
+    # Macro maps must be handled first since they may contain
+    # 'source_key' entries but are not keyboard->target mappings.
+    if details.get('type') == 'macro':
+        # macro triggers - identify if keyboard or mouse trigger
+        if 'source_key' in details:
+            text = f"[{window}] Macro trigger: key {details.get('source_key')} -> Macro {details.get('macro_id')}"
+        elif 'mouse_button' in details:
+            text = f"[{window}] Macro trigger: mouse {details.get('mouse_button')} x{details.get('press_count')} -> Macro {details.get('macro_id')}"
+        else:
+            text = f"[{window}] Macro trigger: -> Macro {details.get('macro_id')}"
+    elif 'source_key' in details:
+        text = (f"[{window}] Source: {details['source_key']} -> "
+                f"Target: {details['target_key']}")
+    elif 'mouse_button' in details:
+        kb_button_str = details['keyboard_button']
+        if isinstance(kb_button_str, Key):
+            kb_button_str = kb_button_str.name
+        text = (f"[{window}] Mouse: {details['mouse_button']} "
+                f"x{details['press_count']} -> Keyboard: {kb_button_str}")
+    details['_display_text'] = text
+    return text
+
+
 class KeyMapperApp(QMainWindow):
     mapping_action_signal = pyqtSignal(object)
 
@@ -51,11 +321,23 @@ class KeyMapperApp(QMainWindow):
         super().__init__()
         self.help_window = None
         self.ping_status_label = PingStatusLabel()
-        self.mappings_lock = QMutex()
-        self.keyboard_controller = keyboard.Controller()
+        # Input listeners only read the mappings, so let them share the lock;
+        # recursive because add/remove refresh the display while holding it
+        self.mappings_lock = QReadWriteLock(QReadWriteLock.RecursionMode.Recursive)
+        self.keyboard_controller = shared_keyboard_controller()
         self.mappings = {}
         self.mapping_ids = []
         self.mapping_counter = 1
+        # trigger lookup tables derived from self.mappings; rebuilt (not
+        # mutated) whenever the mappings change
+        self._kbd_index = {}
+        self._mouse_index = {}
+        # (index, title, matching windows) memos kept by _windows_in_title
+        # for the keyboard and mouse listeners respectively
+        self._kbd_title_match = None
+        self._mouse_title_match = None
+        # mapping id -> window group key in self.mappings
+        self._id_to_window = {}
         self._editing_mapping_id = None
         # editing state for macros (so Edit -> Save works like mappings)
         self._editing_macro_id = None
@@ -69,7 +351,19 @@ class KeyMapperApp(QMainWindow):
 
         self._keyboard_hooks = {}
         self._kbd_ignore = {}
+        # KeyInjectorThread, started with the listeners when available
+        self._kbd_injector = None
+        # Set by MacroThread while a macro plays; input seen within
+        # _synthetic_input_grace of our own injected events doesn't abort it
+        self._macro_running = False
+        self._synthetic_input_grace = 0.25
+        self._last_injected_event_time = 0.0
+        self.macro_thread = None
         self._source_index = {}
+        # window -> source keys, derived from _source_index on each refresh
+        self._hook_keys_by_window = {}
+        # active title the installed hooks were last computed for
+        self._last_hook_title = None
         self._kbd_enabled = bool(self._kbd_available)
         self.initUI()
         self.load_mappings_from_config()
@@ -82,94 +376,82 @@ class KeyMapperApp(QMainWindow):
         self.mapping_action_signal.connect(self._handle_mapping_action)
         self.start_listeners()
 
+        # Written only on the GUI thread (poll timer / watcher slot) and
+        # read from listener threads; a str attribute swap is atomic, so
+        # readers take no lock.
         self._cached_active_title = ""
-        self._active_title_lock = threading.Lock()
+
+        # Macro edits mark what changed and save it once things go quiet
+        # (see _schedule_persist); closeEvent writes everything regardless.
+        self._macros_dirty = False
+        self._mappings_dirty = False
+        self._persist_timer = QTimer(self)
+        self._persist_timer.setSingleShot(True)
+        self._persist_timer.setInterval(500)
+        self._persist_timer.timeout.connect(self._flush_persist)
+
+        # Focus flicker and rapid Alt-Tab produce bursts of title changes;
+        # re-register keyboard hooks only once the title has settled.
+        self._hook_refresh_timer = QTimer(self)
+        self._hook_refresh_timer.setSingleShot(True)
+        self._hook_refresh_timer.setInterval(150)
+        self._hook_refresh_timer.timeout.connect(self._do_hook_refresh)
+
+        # Polling fallback. It runs until the event watcher confirms its
+        # hooks (foreground and title changes) are installed.
+        self._active_title_timer = QTimer(self)
+        self._active_title_timer.setInterval(1000)
+        self._active_title_timer.timeout.connect(self._update_cached_active_title)
+        self._active_title_timer.start()
 
         self._active_watcher = None
         self._active_watcher_available = False
         try:
             self._active_watcher = ActiveWindowEventThread(self)
             self._active_watcher.active_window_changed.connect(self._on_active_window_changed)
+            self._active_watcher.hook_installed.connect(self._on_active_watcher_hooked)
             self._active_watcher.start()
             self._active_watcher_available = True
         except Exception:
             self._active_watcher = None
             self._active_watcher_available = False
 
-        self._active_title_timer = QTimer(self)
-        self._active_title_timer.setInterval(500)
-        self._active_title_timer.timeout.connect(self._update_cached_active_title)
-        # Always run the timer so we detect title changes within the same
-        # foreground window (foreground-change events won't fire for title-only updates).
-        self._active_title_timer.start()
-
         self._ping_threads = set()
+        # Ping results arriving while a flush is pending are batched into
+        # one insertHtml call (see handle_ping_result)
+        self._ping_html_buffer = []
+        self._ping_flush_pending = False
+        # One timer drives the post-result sequence: hide the status label
+        # after 1 s, then reset the indicator 4 s later. A new result
+        # restarts the sequence.
+        self._ping_hide_stage = 0
+        self._ping_hide_timer = QTimer(self)
+        self._ping_hide_timer.setSingleShot(True)
+        self._ping_hide_timer.timeout.connect(self._ping_hide_step)
+        # Last clipboard change seen (monotonic time, text); used to drop the
+        # duplicate dataChanged notifications Windows sends for one copy
+        self._last_clipboard_event = 0.0
+        self._last_clipboard_text = None
 
-        # Timestamp of the most-recent synthetic input we injected on behalf of
-        # a macro. This lets the input handlers distinguish between genuine
-        # user input and synthetic events produced by MacroThread so we don't
-        # abort macros on their own output.
-        self._last_injected_event_time = 0.0
         # Supervisor timer to ensure input listeners/hooks remain active
         self._listener_supervisor = None
 
+    @property
+    def ping_output_view(self):
+        """The ping log view, created on first use."""
+        view = getattr(self, '_ping_output_view', None)
+        if view is None:
+            view = self._ping_output_view = create_ping_output_view(self)
+        return view
+
     def initUI(self):
         self.setWindowTitle("S-Mapper")
         # Use the app store / assets icon for the window icon
-        self.setWindowIcon(QIcon(resource_path(os.path.join('assets', 'Square150x150Logo.png'))))
+        self.setWindowIcon(app_icon('assets/Square150x150Logo.png'))
         self.setGeometry(100, 100, 800, 800)
 
         # Dark mode stylesheet
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #1e1e1e;
-                color: #d4d4d4;
-                font-size: 10pt;
-            }
-            QScrollArea {
-                border: none;
-            }
-            QComboBox {
-                background-color: #252526;
-                border: 1px solid #3a3d41;
-                padding: 5px;
-                selection-background-color: #007acc;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #252526;
-                selection-background-color: #007acc;
-                border: 1px solid #3a3d41;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-            QLineEdit {
-                background-color: #252526;
-                border: 1px solid #3a3d41;
-                padding: 5px;
-                selection-background-color: #007acc;
-            }
-            QPushButton {
-                background-color: #3a3d41;
-                color: #ffffff;
-                border: none;
-                padding: 8px 16px;
-            }
-            QPushButton:hover {
-                background-color: #4a4d51;
-            }
-            QPushButton:pressed {
-                background-color: #007acc;
-            }
-            QListWidget {
-                background-color: #252526;
-                border: 1px solid #3a3d41;
-                selection-background-color: #007acc;
-            }
-            QRadioButton {
-                color: #888888;
-            }
-        """)
+        self.setStyleSheet(_DARK_QSS)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -183,22 +465,15 @@ class KeyMapperApp(QMainWindow):
         # --- Tabs (moved into separate modules) ---
         # Provide keyboard choices before we build each tab (these are used
         # by several tab builders)
-        self.keyboard_keys = [
-            '', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
-            'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
-            '1', '2', '3', '4', '5', '6', '7', '8', '9', '0',
-            'enter', 'esc', 'space', 'shift', 'ctrl', 'alt', 'tab', 'backspace', 'delete',
-            'up', 'down', 'left', 'right',
-            'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
-            '!', '@', '#', '$', '%', '^', '&', '*', '(', ')', '-', '=', '[', ']', '\\',
-            ';', "'", ',', '.', '/', '`', '~', '{', '}', '|', ':', '"', '<', '>', '?',
-            '§', '´', '¨', '±', 'ä', 'å', 'ö', 'ø', 'æ'
-        ]
+        # shared, immutable list of selectable keys used by the tab builders
+        self.keyboard_keys = _KEYBOARD_KEYS
 
         # Build the tabs using the new helper modules (each module will
         # attach widgets and wiring onto the KeyMapperApp instance)
         build_mappings_tab(self)
-        build_ping_log_tab(self)
+        self._ping_log_tab = build_ping_log_tab(self)
+        # flush results buffered while the log was hidden once it shows
+        self._ping_log_tab.installEventFilter(self)
         build_macros_tab(self)
 
         # Diagnostics panel for runtime visibility
@@ -211,60 +486,11 @@ class KeyMapperApp(QMainWindow):
         except Exception:
             pass
 
-        # --- System Tray Icon ---
-        # Detect whether the system tray is available on this platform / session.
-        # Some runtime environments (AppContainer/MSIX, headless sessions, or
-        # restrictive remote sessions) may not provide a system tray — guard
-        # the minimize-to-tray behavior accordingly.
-        self._tray_available = QSystemTrayIcon.isSystemTrayAvailable()
-
-        # Try to load the icon; if loading fails we'll also consider the tray
-        # effectively unavailable so we don't end up hiding the window and
-        # losing the user when showMessage can't be delivered.
-        # Prefer the smaller 44x44 asset for the tray icon (better for small tray sizes)
-        icon = QIcon(resource_path(os.path.join('assets', 'Square44x44Logo.png')))
-        if icon.isNull():
-            # Icon failed to load. Log a short diagnostic and disable tray usage.
-            logging.warning('s_mapper: tray icon failed to load, disabling tray behavior')
-            self._tray_available = False
-
-        if self._tray_available:
-            self.tray_icon = QSystemTrayIcon(self)
-            try:
-                self.tray_icon.setIcon(icon)
-            except Exception:
-                # Guard against unexpected errors setting an icon
-                logging.warning('s_mapper: failed to set tray icon')
-            self.tray_icon.setToolTip("S-Mapper App")
-
-            tray_menu = QMenu()
-            show_action = QAction("Show", self)
-            quit_action = QAction("Exit", self)
-
-            show_action.triggered.connect(self.show_window)
-            quit_action.triggered.connect(self.close)
-
-            tray_menu.addAction(show_action)
-            tray_menu.addAction(quit_action)
-
-            try:
-                self.tray_icon.setContextMenu(tray_menu)
-            except Exception:
-                logging.warning('s_mapper: failed to set tray context menu')
-
-            try:
-                self.tray_icon.show()
-            except Exception:
-                logging.warning('s_mapper: warning - tray_icon.show() failed')
-
-            try:
-                self.tray_icon.activated.connect(self.on_tray_icon_activated)
-            except Exception:
-                logging.warning('s_mapper: warning - failed to connect tray activation')
-        else:
-            # No system tray available in this environment — store a lightweight
-            # None so other code can detect and fall back.
-            self.tray_icon = None
+        # The tray icon is set up right after the first paint; until then
+        # minimize behaves as if no tray were available.
+        self._tray_available = False
+        self.tray_icon = None
+        QTimer.singleShot(0, self._init_tray)
 
         # Setup toolbar and menu (hideable toolbar + Help button)
         try:
@@ -387,16 +613,51 @@ class KeyMapperApp(QMainWindow):
         self.help_window.show()
         self.help_window.activateWindow()
 
+    def _new_keyboard_thread(self):
+        return KeyboardListenerThread(self)
+
+    def _new_mouse_thread(self):
+        mt = MouseListenerThread(self)
+        # Track the pointer from the listener so the ping label can be
+        # placed without querying the OS cursor position each time
+        mt.mouse_moved.connect(self._on_mouse_moved)
+        return mt
+
+    def _ensure_key_injector(self):
+        """Start (or restart) the thread that sends remapped keys."""
+        if not self._kbd_available:
+            return
+        injector = self._kbd_injector
+        if injector is not None and injector.isRunning():
+            return
+        try:
+            injector = KeyInjectorThread(kbd.send)
+            injector.send_failed.connect(self._handle_mapping_action)
+            injector.start()
+            self._kbd_injector = injector
+        except Exception:
+            self._kbd_injector = None
+
     def start_listeners(self):
-        self.keyboard_thread = KeyboardListenerThread(self)
+        self.keyboard_thread = self._new_keyboard_thread()
         self.keyboard_thread.start()
-        self.mouse_thread = MouseListenerThread(self)
+        self._last_mouse_pos = None
+        self.mouse_thread = self._new_mouse_thread()
         self.mouse_thread.start()
         # Macro processing background thread
         try:
             self._ensure_macro_runtime()
         except Exception:
             self.macro_thread = None
+        # Single thread that runs all pings concurrently on an asyncio loop
+        try:
+            self._ping_manager = PingManager()
+            self._ping_manager.ping_html.connect(self.handle_ping_html)
+            self._ping_manager.start()
+        except Exception:
+            self._ping_manager = None
+        # Remapped keys from the low-level hook are sent from here
+        self._ensure_key_injector()
         # If keyboard package-based low-level suppression is available,
         # ensure handlers are registered now (best-effort).
         if self._kbd_available and getattr(self, '_kbd_enabled', False):
@@ -414,6 +675,12 @@ class KeyMapperApp(QMainWindow):
         except Exception:
             self._listener_supervisor = None
 
+    def _on_mouse_moved(self, x, y):
+        self._last_mouse_pos = QPoint(x, y)
+        # The ping label follows the cursor while shown; this slot is already
+        # connected for the whole session, so no per-ping connect/disconnect
+        self.update_label_position(x, y)
+
     def update_label_position(self, x, y):
         if self.ping_status_label.isVisible():
             # Position it above the cursor, slightly to the right
@@ -421,21 +688,19 @@ class KeyMapperApp(QMainWindow):
 
     def _update_cached_active_title(self):
         """Periodically run on the GUI thread to update the cached active
-        window title. The keyboard hook reads the cached value under a lock
-        to minimize expensive calls to pygetwindow in the handler path.
+        window title. The keyboard hook reads the cached value instead of calling
+        pygetwindow in the handler path.
         """
         try:
-            w = gw.getActiveWindow()
-            title = w.title if (w and w.title) else ""
+            title = _foreground_title()
         except Exception:
             title = ""
 
         # store a lower-cased title to simplify case-insensitive matching
         tnorm = title.strip().lower()
         # Detect changes so we only refresh hooks when the active window actually changed
-        with self._active_title_lock:
-            old = self._cached_active_title
-            self._cached_active_title = tnorm
+        old = self._cached_active_title
+        self._cached_active_title = tnorm
 
         try:
             self._diag_set_active_title(title.strip())
@@ -443,11 +708,33 @@ class KeyMapperApp(QMainWindow):
             pass
 
         if tnorm != old and self._kbd_available and getattr(self, '_kbd_enabled', False):
-            try:
-                # Update keyboard hooks for the new active title
-                self._update_hooks_for_active_title(tnorm)
-            except Exception:
-                pass
+            # Update keyboard hooks for the new active title
+            self._schedule_hook_refresh()
+
+    def _schedule_hook_refresh(self):
+        """(Re)start the debounce timer; hooks are updated for whatever
+        title is current when it fires."""
+        timer = getattr(self, '_hook_refresh_timer', None)
+        if timer is not None:
+            timer.start()
+        else:
+            self._do_hook_refresh()
+
+    def _do_hook_refresh(self):
+        title = self._cached_active_title
+        # Focus can bounce away and back inside the debounce window; the
+        # hooks are already right for this title then
+        if title == getattr(self, '_last_hook_title', None):
+            return
+        try:
+            self._update_hooks_for_active_title(title)
+        except Exception:
+            pass
+
+    def _on_active_watcher_hooked(self):
+        """The event watcher now reports every foreground/title change, so
+        the polling timer is no longer needed."""
+        self._active_title_timer.stop()
 
     def _on_active_window_changed(self, new_title: str):
         """
@@ -457,9 +744,8 @@ class KeyMapperApp(QMainWindow):
         """
         try:
             tnorm = (new_title or '').strip().lower()
-            with self._active_title_lock:
-                old = self._cached_active_title
-                self._cached_active_title = tnorm
+            old = self._cached_active_title
+            self._cached_active_title = tnorm
 
             try:
                 self._diag_set_active_title(new_title.strip())
@@ -467,10 +753,7 @@ class KeyMapperApp(QMainWindow):
                 pass
 
             if tnorm != old and self._kbd_available and getattr(self, '_kbd_enabled', False):
-                try:
-                    self._update_hooks_for_active_title(tnorm)
-                except Exception:
-                    pass
+                self._schedule_hook_refresh()
         except Exception:
             pass
 
@@ -482,8 +765,10 @@ class KeyMapperApp(QMainWindow):
 
         try:
             mt = MacroThread(app=self)
+            # hotkey auto-repeat shouldn't queue up copies of the same macro
+            mt.coalesce_repeats = True
             try:
-                mt.macro_log.connect(lambda s: self.ping_output_view.insertPlainText(s + "\n"))
+                mt.macro_log.connect(lambda s: self._log_plain(s + "\n"))
                 mt.macro_log.connect(lambda s: self._diag_set_last_macro_event(s))
             except Exception:
                 pass
@@ -508,25 +793,45 @@ class KeyMapperApp(QMainWindow):
         else:
             self.ip_monitor_toggle_button.setText("Start Monitoring")
 
+    def _on_ip_monitor_window_changed(self, text):
+        self._ip_monitor_window_lower = text.lower()
+
     def on_clipboard_change(self):
         if not self.ip_monitor_toggle_button.isChecked():
             return
 
-        target_window_text = self.ip_monitor_window_entry.text()
-        with self._active_title_lock:
-            active_window_title = self._cached_active_title
+        # lower-cased copy kept current by the entry's textChanged signal
+        target_window_text = getattr(self, '_ip_monitor_window_lower', None)
+        if target_window_text is None:
+            target_window_text = self.ip_monitor_window_entry.text().lower()
+        # the cached title is already stored lower-cased
+        active_window_title = self._cached_active_title
 
-        if not target_window_text or not active_window_title or target_window_text.lower() not in active_window_title.lower():
+        if not target_window_text or not active_window_title or target_window_text not in active_window_title:
             return
 
         clipboard_text = self.clipboard.text()
-        ip_pattern = r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$"
-        
-        if re.match(ip_pattern, clipboard_text):
-            self.ping_status_indicator.setStyleSheet("background-color: #f0ad4e; border-radius: 10px;")
-            cursor_pos = QCursor.pos()
+        now = time.monotonic()
+        if (clipboard_text == getattr(self, '_last_clipboard_text', None)
+                and now - getattr(self, '_last_clipboard_event', 0.0) < 0.25):
+            return
+        self._last_clipboard_event = now
+        self._last_clipboard_text = clipboard_text
+
+        if is_ipv4(clipboard_text):
+            mgr = getattr(self, '_ping_manager', None)
+            use_manager = mgr is not None and mgr.isRunning()
+            # The fallback path starts one thread per ping; cap how many may
+            # run at once (the manager queues excess pings itself)
+            if not use_manager and len(self._ping_threads) >= PingManager.MAX_CONCURRENT:
+                logging.info("Ping for %s skipped: too many pings in flight", clipboard_text)
+                return
+            self.ping_status_indicator.setStyleSheet(_indicator_style("#f0ad4e"))
+            cursor_pos = getattr(self, '_last_mouse_pos', None) or QCursor.pos()
             self.ping_status_label.show_message("Ping sent...", "#FFA500", cursor_pos)
-            self.mouse_thread.mouse_moved.connect(self.update_label_position)
+            if use_manager and mgr.ping(clipboard_text):
+                return
+            # Fall back to a dedicated thread if the manager is unavailable
             pt = PingThread(clipboard_text)
             pt.ping_result.connect(self.handle_ping_result)
             self._ping_threads.add(pt)
@@ -534,50 +839,97 @@ class KeyMapperApp(QMainWindow):
             pt.start()
 
     def handle_ping_result(self, color, output):
+        """Slot for PingThread's raw (color, output) results."""
+        html_content = format_ping_html(self.clipboard.text(), color, output)
+        self._show_ping_html(color, html_content)
+
+    def handle_ping_html(self, color, html_content):
+        """Slot for PingManager results, already formatted off the GUI thread."""
+        self._show_ping_html(color, html_content)
+
+    def _show_ping_html(self, color, html_content):
+        """Update the ping indicator and append a result to the ping log."""
         self.update_ping_indicator(color)
-        
-        header = f"--- Ping results for {self.clipboard.text()} ---"
-        escaped_output = html.escape(output)
 
-        # Prepend a newline if there's already content
-        leading_br = "<br>" if self.ping_output_view.toPlainText() else ""
-        
-        html_content = (
-            f'{leading_br}<div style="color: {color}; font-family: \'Courier New\', Courier, monospace;">'
-            f'<b>{header}</b><br>'
-            f'<pre>{escaped_output}</pre>'
-            '</div>'
-        )
-
-        cursor = self.ping_output_view.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.ping_output_view.setTextCursor(cursor)
-        self.ping_output_view.insertHtml(html_content)
+        buf = self._ping_html_buffer
+        if not self._ping_log_tab.isVisible():
+            # Nobody is looking at the log; keep the result and lay it out
+            # when the tab is shown again (see eventFilter)
+            buf.append(html_content)
+            if len(buf) > _PING_HIDDEN_BACKLOG:
+                del buf[:-_PING_HIDDEN_BACKLOG]
+            return
+        if self._ping_flush_pending:
+            # a burst is in progress; the pending flush picks this up
+            buf.append(html_content)
+            return
+        # Insert the first result right away, then batch anything arriving
+        # in the next 50 ms into a single document update
+        _append_ping_html(self.ping_output_view, [html_content])
+        self._ping_flush_pending = True
+        QTimer.singleShot(50, self._flush_ping_html)
+
+    def eventFilter(self, obj, event):
+        if obj is self._ping_log_tab and event.type() == QEvent.Type.Show:
+            self._flush_ping_html()
+        return super().eventFilter(obj, event)
+
+    def _flush_ping_html(self):
+        self._ping_flush_pending = False
+        buf = self._ping_html_buffer
+        if not buf:
+            return
+        fragments = buf[:]
+        buf.clear()
+        _append_ping_html(self.ping_output_view, fragments)
+
+    def _log_plain(self, text):
+        """Append plain text to the ping log after any buffered ping results,
+        so the log stays in arrival order."""
+        if self._ping_html_buffer:
+            self._flush_ping_html()
+        self.ping_output_view.insertPlainText(text)
 
     def update_ping_indicator(self, color):
-        self.ping_status_indicator.setStyleSheet(f"background-color: {color}; border-radius: 10px;")
-        cursor_pos = QCursor.pos()
+        self.ping_status_indicator.setStyleSheet(_indicator_style(color))
+        cursor_pos = getattr(self, '_last_mouse_pos', None) or QCursor.pos()
         if color == 'red':
             self.ping_status_label.show_message("Ping failed", "red", cursor_pos)
         else:
             self.ping_status_label.show_message("Ping succeeded", "green", cursor_pos)
 
-        QTimer.singleShot(1000, self.hide_ping_status_and_disconnect)
-        QTimer.singleShot(5000, lambda: self.ping_status_indicator.setStyleSheet("background-color: #555; border-radius: 10px;"))
+        self._ping_hide_stage = 0
+        self._ping_hide_timer.start(1000)
+
+    def _ping_hide_step(self):
+        if self._ping_hide_stage == 0:
+            self.hide_ping_status_and_disconnect()
+            self._ping_hide_stage = 1
+            self._ping_hide_timer.start(4000)
+        else:
+            self.ping_status_indicator.setStyleSheet(_indicator_style("#555"))
 
     def hide_ping_status_and_disconnect(self):
         self.ping_status_label.hide()
-        try:
-            self.mouse_thread.mouse_moved.disconnect(self.update_label_position)
-        except TypeError:
-            # Signal was not connected, which is fine.
-            pass
 
     def refresh_window_list(self):
-        self.window_selection_combobox.clear()
-        windows = gw.getWindowsWithTitle('')
-        window_titles = [window.title for window in windows if window.title]
-        self.window_selection_combobox.addItems(window_titles)
+        # read each title once; pygetwindow re-queries Win32 per access
+        window_titles = tuple(t for t in (w.title for w in gw.getWindowsWithTitle('')) if t)
+        if window_titles == getattr(self, '_last_window_titles', None):
+            # nothing changed; keep the current list and selection
+            return
+        self._last_window_titles = window_titles
+
+        combo = self.window_selection_combobox
+        # one repaint and no currentIndexChanged storm while repopulating
+        combo.blockSignals(True)
+        combo.setUpdatesEnabled(False)
+        try:
+            combo.clear()
+            combo.addItems(window_titles)
+        finally:
+            combo.setUpdatesEnabled(True)
+            combo.blockSignals(False)
 
     def clear(self):
         self.mouse_button_combobox.setCurrentIndex(0)
@@ -697,12 +1049,9 @@ class KeyMapperApp(QMainWindow):
 
         mapping_id = self.mapping_ids[selected_index]
 
-        # Find the mapping details
-        details = None
-        for win_title, mappings in self.mappings.items():
-            if mapping_id in mappings:
-                details = mappings[mapping_id]
-                break
+        # Find the mapping details through the id -> window index
+        window = self._find_mapping_window(mapping_id)
+        details = self.mappings.get(window, {}).get(mapping_id)
 
         if not details:
             return
@@ -794,9 +1143,7 @@ class KeyMapperApp(QMainWindow):
                 QMessageBox.warning(self, "Input Error", "Please specify a target key when saving a mouse mapping.")
                 return
 
-            final_key = target_key
-            if target_key.startswith('f') and target_key[1:].isdigit():
-                final_key = getattr(Key, target_key.lower(), target_key)
+            final_key = _FN_KEY_OBJS.get(target_key, target_key)
 
             new_details = {
                 'mouse_button': mouse_button,
@@ -810,18 +1157,11 @@ class KeyMapperApp(QMainWindow):
             return
 
         # Update mapping in self.mappings (move if window changed)
-        with QMutexLocker(self.mappings_lock):
+        def _move_mapping():
             # Remove from old location
-            old_window = None
-            for w, mappings in list(self.mappings.items()):
-                if mapping_id in mappings:
-                    old_window = w
-                    break
-
+            old_window = self._find_mapping_window(mapping_id)
             if old_window is None:
-                QMessageBox.warning(self, "Internal Error", "Original mapping not found; cannot save changes.")
-                self._exit_edit_mode()
-                return
+                return False
 
             # Delete old mapping reference
             try:
@@ -837,10 +1177,15 @@ class KeyMapperApp(QMainWindow):
                 self.mappings[target_window] = {}
 
             self.mappings[target_window][mapping_id] = new_details
+            self._id_to_window[mapping_id] = target_window
+
+        if not self._apply_mapping_change(_move_mapping):
+            QMessageBox.warning(self, "Internal Error", "Original mapping not found; cannot save changes.")
+            self._exit_edit_mode()
+            return
 
-        # Reset UI and display
+        # Reset UI
         self._exit_edit_mode()
-        self.update_mappings_display()
         self.clear()
 
     def _exit_edit_mode(self):
@@ -895,20 +1240,17 @@ class KeyMapperApp(QMainWindow):
         menu.exec(self.mappings_listbox.mapToGlobal(pos))
 
     # --- Macros management ---
-    def _add_macro_from_editor(self):
-        # If editing an existing macro, save changes instead of creating new
-        if getattr(self, '_editing_macro_id', None):
-            return self._save_edited_macro()
+    def _collect_macro_from_form(self, macro_id):
+        """Build a macro dict with id ``macro_id`` from the macro editor fields.
 
+        Returns ``(macro, None)``, or ``(None, message)`` when the form is
+        not valid; showing the message is left to the caller.
+        """
         name = self.macro_name_entry.text().strip()
         if not name:
-            QMessageBox.warning(self, "Input Error", "Please provide a name for the macro.")
-            return
+            return None, "Please provide a name for the macro."
         actions_text = self.macro_actions_text.toPlainText().strip()
-        actions = [l.strip() for l in actions_text.splitlines() if l.strip()]
-        # create unique macro id and register
-        macro_id = f"Macro {self.mapping_counter}"
-        self.mapping_counter += 1
+        actions = [line for line in (l.strip() for l in actions_text.splitlines()) if line]
 
         trigger_type = 'none'
         source_key = ''
@@ -926,7 +1268,7 @@ class KeyMapperApp(QMainWindow):
             press_count = int(self.macro_mouse_presses.value())
             window_title = self.macro_trigger_window_entry.text().lower().strip()
 
-        macro = {
+        return {
             'id': macro_id,
             'name': name,
             'actions': actions,
@@ -935,7 +1277,21 @@ class KeyMapperApp(QMainWindow):
             'mouse_button': mouse_button,
             'press_count': press_count,
             'window_title': window_title,
-        }
+        }, None
+
+    def _add_macro_from_editor(self):
+        # If editing an existing macro, save changes instead of creating new
+        if getattr(self, '_editing_macro_id', None):
+            return self._save_edited_macro()
+
+        # create unique macro id and register
+        macro, error = self._collect_macro_from_form(f"Macro {self.mapping_counter}")
+        if error:
+            QMessageBox.warning(self, "Input Error", error)
+            return
+        macro_id = macro['id']
+        self.mapping_counter += 1
+        trigger_type = macro['trigger_type']
 
         # append and register
         self.macros.append(macro)
@@ -944,26 +1300,11 @@ class KeyMapperApp(QMainWindow):
 
         # If a trigger was provided, add a mapping entry so the macro will fire like other mappings
         if trigger_type in ('keyboard', 'mouse'):
-            details = {'type': 'macro', 'macro_id': macro_id, 'window_title': window_title}
-            if trigger_type == 'keyboard':
-                details['source_key'] = source_key
-            elif trigger_type == 'mouse':
-                details['mouse_button'] = mouse_button
-                details['press_count'] = press_count
-
             # use a custom mapping id equal to macro_id
-            self._add_mapping_details(details, mapping_id=macro_id)
+            self._add_mapping_details(_macro_trigger_details(macro), mapping_id=macro_id)
 
         # persist macros and mappings to disk
-        try:
-            self.save_macros_to_config()
-        except Exception:
-            pass
-        if trigger_type in ('keyboard', 'mouse'):
-            try:
-                self.save_mappings_to_config()
-            except Exception:
-                pass
+        self._schedule_persist(macros=True, mappings=trigger_type in ('keyboard', 'mouse'))
 
     def edit_macro(self):
         """Populate the macro editor with the selected macro and enter edit mode."""
@@ -997,14 +1338,8 @@ class KeyMapperApp(QMainWindow):
         if not macro_id:
             return
 
-        # Find the macro we are editing
-        idx = None
-        for i, m in enumerate(self.macros):
-            if m.get('id') == macro_id:
-                idx = i
-                break
-
-        if idx is None:
+        old_macro = self.macros_by_id.get(macro_id)
+        if old_macro is None:
             # Nothing to save
             self._editing_macro_id = None
             try:
@@ -1017,68 +1352,26 @@ class KeyMapperApp(QMainWindow):
                 pass
             return
 
-        # Validate name
-        name = self.macro_name_entry.text().strip()
-        if not name:
-            QMessageBox.warning(self, "Input Error", "Please provide a name for the macro.")
+        new_macro, error = self._collect_macro_from_form(macro_id)
+        if error:
+            QMessageBox.warning(self, "Input Error", error)
             return
 
-        actions_text = self.macro_actions_text.toPlainText().strip()
-        actions = [l.strip() for l in actions_text.splitlines() if l.strip()]
-
-        trigger_type = 'none'
-        source_key = ''
-        mouse_button = ''
-        press_count = 0
-        window_title = ''
-
-        if self.macro_trigger_key_rb.isChecked():
-            trigger_type = 'keyboard'
-            source_key = self.macro_key_combobox.currentText().lower().strip()
-            window_title = self.macro_trigger_window_entry.text().lower().strip()
-        elif self.macro_trigger_mouse_rb.isChecked():
-            trigger_type = 'mouse'
-            mouse_button = self.macro_mouse_button_combobox.currentText().lower().strip()
-            press_count = int(self.macro_mouse_presses.value())
-            window_title = self.macro_trigger_window_entry.text().lower().strip()
-
-        new_macro = {
-            'id': macro_id,
-            'name': name,
-            'actions': actions,
-            'trigger_type': trigger_type,
-            'source_key': source_key,
-            'mouse_button': mouse_button,
-            'press_count': press_count,
-            'window_title': window_title,
-        }
-
-        # Replace macro in list and registry
-        self.macros[idx] = new_macro
-        self.macros_by_id[macro_id] = new_macro
-
-        # Update / remove mapping entry for this macro id according to trigger presence
-        # Remove any existing mapping entries with this id first
-        try:
-            # mapping ids are stored under window groups; delete any mapping_id == macro_id
-            for w in list(self.mappings.keys()):
-                if macro_id in self.mappings.get(w, {}):
-                    del self.mappings[w][macro_id]
-                    if not self.mappings[w]:
-                        del self.mappings[w]
-        except Exception:
-            pass
+        # Update the macro in place: the list and the id registry share this
+        # dict, so there is no list position to look up
+        old_macro.clear()
+        old_macro.update(new_macro)
 
-        if trigger_type in ('keyboard', 'mouse') and window_title:
-            details = {'type': 'macro', 'macro_id': macro_id, 'window_title': window_title}
-            if trigger_type == 'keyboard':
-                details['source_key'] = source_key
-            else:
-                details['mouse_button'] = mouse_button
-                details['press_count'] = press_count
+        def _retrigger():
+            # Replace the mapping entry that fires this macro with one for
+            # its new trigger, if it still has one
+            self._drop_mapping(macro_id)
+            window = old_macro['window_title']
+            if old_macro['trigger_type'] in ('keyboard', 'mouse') and window:
+                self.mappings.setdefault(window, {})[macro_id] = _macro_trigger_details(old_macro)
+                self._id_to_window[macro_id] = window
 
-            # add mapping back with same macro id so mapping references are retained
-            self._add_mapping_details(details, mapping_id=macro_id)
+        self._apply_mapping_change(_retrigger)
 
         # Finish and refresh UI
         self._refresh_macros_display()
@@ -1092,14 +1385,7 @@ class KeyMapperApp(QMainWindow):
         except Exception:
             pass
         # Persist changes and any mapping updates
-        try:
-            self.save_macros_to_config()
-        except Exception:
-            pass
-        try:
-            self.save_mappings_to_config()
-        except Exception:
-            pass
+        self._schedule_persist(macros=True, mappings=True)
 
     def _cancel_macro_editing(self):
         """Cancel macro editing and restore Add button state without changing macros."""
@@ -1140,30 +1426,15 @@ class KeyMapperApp(QMainWindow):
         if sel < 0 or sel >= len(self.macros):
             return
         # remove macro and any mapping that references it
-        m = self.macros[sel]
-        macro_id = m.get('id')
-        del self.macros[sel]
-        try:
-            if macro_id:
-                # Walk mappings and remove any mapping entries with this id
-                for w in list(self.mappings.keys()):
-                    if macro_id in self.mappings.get(w, {}):
-                        del self.mappings[w][macro_id]
-                        if not self.mappings[w]:
-                            del self.mappings[w]
-        except Exception:
-            pass
+        macro_id = self.macros.pop(sel).get('id')
+        if macro_id:
+            self.macros_by_id.pop(macro_id, None)
+            # remove the mapping entry that triggers this macro
+            self._apply_mapping_change(lambda: self._drop_mapping(macro_id))
 
         self._refresh_macros_display()
         # persist to disk
-        try:
-            self.save_macros_to_config()
-        except Exception:
-            pass
-        try:
-            self.save_mappings_to_config()
-        except Exception:
-            pass
+        self._schedule_persist(macros=True, mappings=True)
 
     def _run_selected_macro(self):
         sel = self.macros_listbox.currentRow()
@@ -1184,10 +1455,17 @@ class KeyMapperApp(QMainWindow):
             QMessageBox.warning(self, "Unavailable", "Macro runtime unavailable.")
 
     def _refresh_macros_display(self):
-        self.macros_listbox.clear()
-        for m in self.macros:
-            name = m.get('name','')
-            self.macros_listbox.addItem(name)
+        names = [m.get('name', '') for m in self.macros]
+        # Repopulate in one batch, as update_mappings_display does
+        listbox = self.macros_listbox
+        listbox.setUpdatesEnabled(False)
+        listbox.blockSignals(True)
+        try:
+            listbox.clear()
+            listbox.addItems(names)
+        finally:
+            listbox.blockSignals(False)
+            listbox.setUpdatesEnabled(True)
 
     # --- Macro recording helpers ---
     def _start_recording(self):
@@ -1198,7 +1476,11 @@ class KeyMapperApp(QMainWindow):
 
         # Create recorder (capture mouse clicks too for convenience)
         try:
-            self._macro_recorder = MacroRecorder(include_mouse=True)
+            self._macro_recorder = MacroRecorder(
+                include_mouse=True,
+                keyboard_thread=getattr(self, 'keyboard_thread', None),
+                mouse_thread=getattr(self, 'mouse_thread', None),
+            )
             self._macro_recorder.recorded.connect(self._on_macro_recorded)
             self._macro_recorder.start()
             self.record_macro_button.setEnabled(False)
@@ -1257,27 +1539,24 @@ class KeyMapperApp(QMainWindow):
 
     def _add_mapping_details(self, details, mapping_id=None):
         """Adds a validated mapping details dictionary to the central store."""
-        with QMutexLocker(self.mappings_lock):
-            target_window = details.get('window_title', '')
-            if not target_window:
-                return
+        target_window = details.get('window_title', '')
+        if not target_window:
+            return
 
-            if mapping_id is None:
-                mapping_id = f"Mapping {self.mapping_counter}"
+        def _insert():
+            mid = mapping_id
+            if mid is None:
+                mid = f"Mapping {self.mapping_counter}"
                 self.mapping_counter += 1
 
             if target_window not in self.mappings:
                 self.mappings[target_window] = {}
 
-            self.mappings[target_window][mapping_id] = details
-            self.mapping_ids.append(mapping_id)
-            self.update_mappings_display()
-        
-        if self._kbd_available and getattr(self, '_kbd_enabled', False):
-            try:
-                self._refresh_keyboard_hooks()
-            except Exception:
-                pass
+            self.mappings[target_window][mid] = details
+            self.mapping_ids.append(mid)
+            self._id_to_window[mid] = target_window
+
+        self._apply_mapping_change(_insert)
         self.clear()
 
     def add_mouse_mapping(self):
@@ -1303,9 +1582,7 @@ class KeyMapperApp(QMainWindow):
         if modifier_key:
             keyboard_button = f"{modifier_key} + {keyboard_button}"
 
-        final_key = keyboard_button
-        if keyboard_button.startswith('f') and keyboard_button[1:].isdigit():
-            final_key = getattr(Key, keyboard_button.lower(), keyboard_button)
+        final_key = _FN_KEY_OBJS.get(keyboard_button, keyboard_button)
 
         details = {
             'mouse_button': mouse_button,
@@ -1346,70 +1623,152 @@ class KeyMapperApp(QMainWindow):
         
         selected_index = self.mappings_listbox.row(selected_item)
         
-        with QMutexLocker(self.mappings_lock):
-            mapping_id = self.mapping_ids.pop(selected_index)
-
-            for target_window in self.mappings:
-                if mapping_id in self.mappings[target_window]:
-                    del self.mappings[target_window][mapping_id]
-                    break
-            
-            self.update_mappings_display()
+        def _remove():
+            self._drop_mapping(self.mapping_ids.pop(selected_index))
+
+        self._apply_mapping_change(_remove)
+
+    def _find_mapping_window(self, mapping_id):
+        """Return the window group holding ``mapping_id``, or None."""
+        window = self._id_to_window.get(mapping_id)
+        if window is not None and mapping_id in self.mappings.get(window, ()):
+            return window
+        return None
+
+    def _drop_mapping(self, mapping_id):
+        """Remove ``mapping_id`` from its window group, dropping the group if
+        it ends up empty, and forget its id -> window entry. Returns False if
+        there was no such mapping (see _apply_mapping_change)."""
+        window = self._find_mapping_window(mapping_id)
+        self._id_to_window.pop(mapping_id, None)
+        if window is None:
+            return False
+        group = self.mappings[window]
+        del group[mapping_id]
+        if not group:
+            del self.mappings[window]
+        return True
+
+    def _apply_mapping_change(self, mutate):
+        """Run ``mutate()`` against ``self.mappings`` under one write-lock hold.
+
+        The trigger indexes are rebuilt before the lock is released so
+        listeners never see mappings and indexes out of step; the mappings
+        list and (when suppression is on) the low-level hooks are then
+        refreshed once. If ``mutate`` returns False nothing changed and no
+        refresh happens.
+
+        The hooks are derived purely from the keyboard index, so they are
+        left alone when a change (e.g. a mouse-only edit) leaves that index
+        as it was.
+        """
+        with QWriteLocker(self.mappings_lock):
+            if mutate() is False:
+                return False
+            old_kbd_index = self._kbd_index
+            self._rebuild_trigger_indexes()
+            kbd_changed = self._kbd_index != old_kbd_index
 
-        # Update low-level hooks if suppression is enabled
-        if self._kbd_available and getattr(self, '_kbd_enabled', False):
+        self.update_mappings_display()
+        if kbd_changed and self._kbd_available and self._kbd_enabled:
             try:
                 self._refresh_keyboard_hooks()
             except Exception:
                 pass
+        return True
 
-    def update_mappings_display(self):
-        self.mappings_listbox.clear()
-        
-        temp_id_list = []
-        for target_window, mappings in self.mappings.items():
-            for mapping_id, details in mappings.items():
-                if not details:
-                    continue
+    def _rebuild_trigger_indexes(self):
+        # Swap in fresh dicts so a listener thread mid-lookup keeps a
+        # consistent snapshot of the old tables
+        self._kbd_index, self._mouse_index = _build_trigger_indexes(self.mappings)
 
-                temp_id_list.append(mapping_id)
-                display_text = ""
-                # Macro maps must be handled first since they may contain
-                # 'source_key' entries but are not keyboard->target mappings.
-                if details.get('type') == 'macro':
-                    # macro triggers - identify if keyboard or mouse trigger
-                    if 'source_key' in details:
-                        display_text = f"[{target_window}] Macro trigger: key {details.get('source_key')} -> Macro {details.get('macro_id')}"
-                    elif 'mouse_button' in details:
-                        display_text = f"[{target_window}] Macro trigger: mouse {details.get('mouse_button')} x{details.get('press_count')} -> Macro {details.get('macro_id')}"
-                    else:
-                        display_text = f"[{target_window}] Macro trigger: -> Macro {details.get('macro_id')}"
-                elif 'source_key' in details:
-                    display_text = (f"[{target_window}] Source: {details['source_key']} -> "
-                                    f"Target: {details['target_key']}")
-                elif 'mouse_button' in details:
-                    kb_button_str = details['keyboard_button']
-                    if isinstance(kb_button_str, Key):
-                        kb_button_str = kb_button_str.name
-                    display_text = (f"[{target_window}] Mouse: {details['mouse_button']} "
-                                    f"x{details['press_count']} -> Keyboard: {kb_button_str}")
-                elif details.get('type') == 'macro':
-                    # macro triggers - identify if keyboard or mouse trigger
-                    if 'source_key' in details:
-                        display_text = f"[{target_window}] Macro: key {details.get('source_key')} -> Macro {details.get('macro_id')}"
-                    elif 'mouse_button' in details:
-                        display_text = f"[{target_window}] Macro: mouse {details.get('mouse_button')} x{details.get('press_count')} -> Macro {details.get('macro_id')}"
-                self.mappings_listbox.addItem(display_text)
+    def update_mappings_display(self):
+        # Snapshot (id, text) pairs under the read lock, then repaint from
+        # the plain lists without touching self.mappings again
+        with QReadLocker(self.mappings_lock):
+            rows = [(mapping_id, _render_display(details, target_window))
+                    for target_window, mappings in self.mappings.items()
+                    for mapping_id, details in mappings.items()
+                    if details]
+        temp_id_list = [mapping_id for mapping_id, _ in rows]
+        display_texts = [text for _, text in rows]
+
+        # Repopulate in one batch so the view lays out and repaints once
+        listbox = self.mappings_listbox
+        listbox.setUpdatesEnabled(False)
+        listbox.blockSignals(True)
+        try:
+            listbox.clear()
+            listbox.addItems(display_texts)
+        finally:
+            listbox.blockSignals(False)
+            listbox.setUpdatesEnabled(True)
         self.mapping_ids = temp_id_list
 
 
-    def on_tray_icon_activated(self, reason):
-        if reason == QSystemTrayIcon.ActivationReason.Trigger:  # Left click
-            self.show_window()
+    def _init_tray(self):
+        # --- System Tray Icon ---
+        # Detect whether the system tray is available on this platform / session.
+        # Some runtime environments (AppContainer/MSIX, headless sessions, or
+        # restrictive remote sessions) may not provide a system tray — guard
+        # the minimize-to-tray behavior accordingly.
+        self._tray_available = QSystemTrayIcon.isSystemTrayAvailable()
 
-    def show_window(self):
-        self.showNormal()
-        self.activateWindow()
+        # Try to load the icon; if loading fails we'll also consider the tray
+        # effectively unavailable so we don't end up hiding the window and
+        # losing the user when showMessage can't be delivered.
+        # Prefer the smaller 44x44 asset for the tray icon (better for small tray sizes)
+        icon = app_icon('assets/Square44x44Logo.png')
+        if icon.isNull():
+            # Icon failed to load. Log a short diagnostic and disable tray usage.
+            logging.warning('s_mapper: tray icon failed to load, disabling tray behavior')
+            self._tray_available = False
+
+        if self._tray_available:
+            self.tray_icon = QSystemTrayIcon(self)
+            try:
+                self.tray_icon.setIcon(icon)
+            except Exception:
+                # Guard against unexpected errors setting an icon
+                logging.warning('s_mapper: failed to set tray icon')
+            self.tray_icon.setToolTip("S-Mapper App")
+
+            tray_menu = QMenu()
+            show_action = QAction("Show", self)
+            quit_action = QAction("Exit", self)
+
+            show_action.triggered.connect(self.show_window)
+            quit_action.triggered.connect(self.close)
+
+            tray_menu.addAction(show_action)
+            tray_menu.addAction(quit_action)
+
+            try:
+                self.tray_icon.setContextMenu(tray_menu)
+            except Exception:
+                logging.warning('s_mapper: failed to set tray context menu')
+
+            try:
+                self.tray_icon.show()
+            except Exception:
+                logging.warning('s_mapper: warning - tray_icon.show() failed')
+
+            try:
+                self.tray_icon.activated.connect(self.on_tray_icon_activated)
+            except Exception:
+                logging.warning('s_mapper: warning - failed to connect tray activation')
+        else:
+            # No system tray available in this environment — store a lightweight
+            # None so other code can detect and fall back.
+            self.tray_icon = None
+
+    def on_tray_icon_activated(self, reason):
+        if reason == QSystemTrayIcon.ActivationReason.Trigger:  # Left click
+            self.show_window()
+
+    def show_window(self):
+        self.showNormal()
+        self.activateWindow()
 
     def changeEvent(self, event):
         if event.type() == QEvent.Type.WindowStateChange:
@@ -1449,7 +1808,7 @@ class KeyMapperApp(QMainWindow):
 
     def on_press(self, key):
         try:
-            with QMutexLocker(self.mappings_lock):
+            with QReadLocker(self.mappings_lock):
                 # If a macro is currently running, attempt to determine if the
                 # incoming event is synthetic (generated by our MacroThread).
                 # We use a short grace window—events within the window are
@@ -1495,32 +1854,49 @@ class KeyMapperApp(QMainWindow):
 
                 pressed_key = pressed_key.lower().strip()
 
-                with self._active_title_lock:
-                    current_title = self._cached_active_title
+                current_title = self._cached_active_title
 
                 if not current_title:
                     return
 
-                for window_title, mappings in self.mappings.items():
-                    if not window_title:
-                        continue
-                    if window_title.strip().lower() in current_title:
-                        for details in mappings.values():
-                            if details.get('source_key', '').lower().strip() == pressed_key:
-                                if details.get('type') == 'macro':
-                                    self.mapping_action_signal.emit(details)
-                                else:
-                                    self.mapping_action_signal.emit(details['target_key'])
-                                return
+                kbd_index = self._kbd_index
+                entries = kbd_index.get(pressed_key)
+                if not entries:
+                    return
+
+                self._kbd_title_match = self._windows_in_title(
+                    self._kbd_title_match, kbd_index, current_title)
+                active = self._kbd_title_match[2]
+                for window, action in entries:
+                    if window in active:
+                        self.mapping_action_signal.emit(action)
+                        return
         except Exception:
             logging.exception("on_press")
 
+    @staticmethod
+    def _windows_in_title(memo, index, title):
+        """Return the ``(index, title, windows)`` memo for ``title``, where
+        ``windows`` are the window fragments in trigger ``index`` that occur
+        in ``title``.
+
+        The result only changes when the focused title or the index does, so
+        ``memo`` (the listener's previous result) is handed back as-is in the
+        common case and the listeners pay a single set lookup per event
+        instead of a substring test per mapped window. It is a single tuple
+        so another thread never sees a half-updated memo.
+        """
+        if memo is not None and memo[0] is index and memo[1] == title:
+            return memo
+        matching = frozenset(entry[0] for entries in index.values()
+                             for entry in entries if entry[0] in title)
+        return (index, title, matching)
+
     def on_click(self, x, y, button, pressed):
         if not pressed:
             return
 
-        with self._active_title_lock:
-            target_window_title = self._cached_active_title
+        target_window_title = self._cached_active_title
 
         if not target_window_title:
             return
@@ -1539,26 +1915,25 @@ class KeyMapperApp(QMainWindow):
 
         action_to_run = None
 
-        with QMutexLocker(self.mappings_lock):
-            for partial_title, mappings in self.mappings.items():
-                if partial_title.strip().lower() in target_window_title:
-                    for details in mappings.values():
-                        if 'mouse_button' not in details:
-                            continue
-
-                        if (details['mouse_button'].lower().strip() == button_name and
-                                details['press_count'] == self.click_counts[button_name]):
+        # Only the index fetch needs the lock; the entries list is never
+        # mutated after it's built, and click_counts is only touched from
+        # the mouse listener thread.
+        with QReadLocker(self.mappings_lock):
+            mouse_index = self._mouse_index
+            entries = mouse_index.get(button_name, ())
 
-                            self.click_counts[button_name] = 0
-                            if details.get('type') == 'macro':
-                                action_to_run = details
-                            else:
-                                action_to_run = details['keyboard_button']
-                            break
+        if not entries:
+            return
 
-                    if action_to_run:
-                        break
-            pass
+        self._mouse_title_match = self._windows_in_title(
+            self._mouse_title_match, mouse_index, target_window_title)
+        active = self._mouse_title_match[2]
+        count = self.click_counts[button_name]
+        for window, press_count, action in entries:
+            if press_count == count and window in active:
+                self.click_counts[button_name] = 0
+                action_to_run = action
+                break
 
         if not action_to_run:
             return
@@ -1593,51 +1968,43 @@ class KeyMapperApp(QMainWindow):
         """
         Returns the platform-specific, user-writable path for the mappings.ini file.
         """
-        app_data_path = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r"~\AppData\Local")
-        config_dir = os.path.join(app_data_path, 'S-Mapper')
-        try:
-            os.makedirs(config_dir, exist_ok=True)
-        except Exception:
-            return 'mappings.ini'
-        return os.path.join(config_dir, 'mappings.ini')
+        # resolved once; every save/load goes through here
+        path = getattr(self, '_config_filepath', None)
+        if path is None:
+            path = self._config_filepath = _user_config_path('mappings.ini')
+        return path
 
     def _get_macros_filepath(self):
         """Return platform-specific path for macros.ini in same folder as mappings.ini."""
-        app_data_path = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r"~\AppData\Local")
-        config_dir = os.path.join(app_data_path, 'S-Mapper')
-        try:
-            os.makedirs(config_dir, exist_ok=True)
-        except Exception:
-            return 'macros.ini'
-        return os.path.join(config_dir, 'macros.ini')
+        path = getattr(self, '_macros_filepath', None)
+        if path is None:
+            path = self._macros_filepath = _user_config_path('macros.ini')
+        return path
 
     def save_mappings_to_config(self):
-        config = configparser.ConfigParser()
+        config = configparser.ConfigParser(interpolation=None)
         config.optionxform = str
         
-        self.mappings_lock.lock()
-        try:
-            all_mappings = {}
-            for mappings_by_window in self.mappings.values():
-                all_mappings.update(mappings_by_window)
-        finally:
-            self.mappings_lock.unlock()
+        # Copy the mappings out under the lock; building the config and the
+        # disk write below then never hold up the input listeners.
+        with QReadLocker(self.mappings_lock):
+            snapshot = [(mapping_id, dict(details))
+                        for mappings_by_window in self.mappings.values()
+                        for mapping_id, details in mappings_by_window.items()]
 
         # Persist application settings in a dedicated section so the
         # click interval is preserved between runs.
-        config['Settings'] = {}
-        config['Settings']['click_interval'] = str(self.click_interval)
+        settings = {'click_interval': str(self.click_interval)}
         # store clipboard ping monitor 'target window' string so it survives restarts
         try:
-            config['Settings']['ip_monitor_window'] = str(self.ip_monitor_window_entry.text())
+            settings['ip_monitor_window'] = str(self.ip_monitor_window_entry.text())
         except Exception:
             # non-GUI test shims may not have this attribute
             pass
+        sections = {'Settings': settings}
 
-        for mapping_id, details in all_mappings.items():
-            config[mapping_id] = {}
-            section = config[mapping_id]
-            section['window_title'] = details.get('window_title', '')
+        for mapping_id, details in snapshot:
+            section = {'window_title': details.get('window_title', '')}
 
             if 'mouse_button' in details:
                 section['type'] = 'mouse'
@@ -1654,12 +2021,21 @@ class KeyMapperApp(QMainWindow):
                 section['source_key'] = details['source_key']
                 section['target_key'] = details['target_key']
 
-        with open(self._get_config_filepath(), 'w') as configfile:
+            sections[mapping_id] = section
+
+        config.read_dict(sections)
+
+        # Write next to the real file and swap it in so a crash mid-write
+        # can't leave a truncated mappings.ini behind
+        config_path = self._get_config_filepath()
+        tmp_path = config_path + '.tmp'
+        with open(tmp_path, 'w') as configfile:
             config.write(configfile)
+        os.replace(tmp_path, config_path)
 
     def save_macros_to_config(self):
         """Persist the in-memory macros list to macros.ini next to mappings.ini."""
-        config = configparser.ConfigParser()
+        config = configparser.ConfigParser(interpolation=None)
         config.optionxform = str
 
         # simple global settings section in case we want to persist UI state later
@@ -1707,7 +2083,7 @@ class KeyMapperApp(QMainWindow):
                                     except Exception:
                                         pass
                                     try:
-                                        self.ping_output_view.insertPlainText(f"Macro queued: {macro.get('name','<unnamed>')}\n")
+                                        self._log_plain(f"Macro queued: {macro.get('name','<unnamed>')}\n")
                                     except Exception:
                                         pass
                                 except Exception:
@@ -1744,15 +2120,7 @@ class KeyMapperApp(QMainWindow):
                         kb_button_str = ''
             
 
-            parts = [p.strip() for p in kb_button_str.replace(' + ', '+').split('+')]
-            main_key = parts[-1]
-            # mapping for known modifier names -> Key attributes
-            mod_map = {'ctrl': Key.ctrl, 'control': Key.ctrl, 'shift': Key.shift, 'alt': Key.alt,
-                       'win': Key.cmd, 'windows': Key.cmd, 'cmd': Key.cmd, 'meta': Key.cmd}
-
-            modifiers = [m.lower() for m in parts[:-1] if m]
-            modifier_keys = [mod_map.get(m) for m in modifiers if mod_map.get(m) is not None]
-            key_to_press = getattr(Key, main_key, main_key)
+            modifier_keys, key_to_press = _parse_target(kb_button_str)
 
             if modifier_keys:
                 with self.keyboard_controller.pressed(*modifier_keys):
@@ -1763,10 +2131,12 @@ class KeyMapperApp(QMainWindow):
                 self.keyboard_controller.release(key_to_press)
 
         except Exception as e:
-            logging.exception(f"Mapping action failed (main thread): {e}")
+            logging.exception("Mapping action failed (main thread): %s", e)
 
     def load_mappings_from_config(self):
-        config = configparser.ConfigParser()
+        # Nothing we store uses %-interpolation, so skip that machinery on
+        # every option lookup (and let '%' appear in titles/keys verbatim)
+        config = configparser.ConfigParser(interpolation=None)
         config.optionxform = str
         
         config_path = self._get_config_filepath()
@@ -1780,31 +2150,30 @@ class KeyMapperApp(QMainWindow):
                 return
 
         config.read(config_path)
+        # Copy every section into a plain dict once up front
+        sections = {name: dict(config[name]) for name in config.sections()}
+        settings = sections.pop('Settings', {})
         highest_mapping_number = 0
 
-        self.mappings_lock.lock()
-        try:
+        def _reload():
+            nonlocal highest_mapping_number
             self.mappings.clear()
             self.mapping_ids.clear()
+            id_to_window = self._id_to_window = {}
 
-            for section_name in config.sections():
-                if section_name in ['DEFAULT', 'Settings']:
-                    continue
-
+            for mapping_id, config_section in sections.items():
                 try:
-                    mapping_id = section_name
                     details = {}
-                    config_section = config[section_name]
-                    
+                
                     mapping_type = config_section.get('type')
                     target_window = config_section.get('window_title', '')
                     details['window_title'] = target_window
 
                     if mapping_type == 'mouse':
                         details['mouse_button'] = config_section.get('mouse_button')
-                        details['press_count'] = config_section.getint('press_count')
-                        kb_button_str = config_section.get('target_key')
-                        
+                        details['press_count'] = int(config_section['press_count'])
+                        kb_button_str = config_section['target_key']
+                    
                         if kb_button_str.startswith('Key.'):
                             key_name = kb_button_str.split('.', 1)[1]
                             details['keyboard_button'] = getattr(Key, key_name, key_name)
@@ -1820,36 +2189,29 @@ class KeyMapperApp(QMainWindow):
 
                     if target_window not in self.mappings:
                         self.mappings[target_window] = {}
-                    
+                
                     self.mappings[target_window][mapping_id] = details
                     self.mapping_ids.append(mapping_id)
+                    id_to_window[mapping_id] = target_window
 
                     num_part = mapping_id.split()[-1]
                     if num_part.isdigit():
                         mapping_number = int(num_part)
                         if mapping_number > highest_mapping_number:
                             highest_mapping_number = mapping_number
-                
-                except (configparser.NoOptionError, ValueError, IndexError) as e:
-                    logging.warning(f"Skipping malformed or incomplete section {section_name}: {e}")
+            
+                except (KeyError, ValueError, IndexError) as e:
+                    logging.warning("Skipping malformed or incomplete section %s: %s", mapping_id, e)
                     continue
-        finally:
-            self.mappings_lock.unlock()
 
+        # Swaps in the loaded mappings and syncs the list and low-level hooks
+        self._apply_mapping_change(_reload)
         self.mapping_counter = highest_mapping_number + 1
-        self.update_mappings_display()
-
-        # Sync low-level hooks after loading mappings from disk
-        if self._kbd_available and getattr(self, '_kbd_enabled', False):
-            try:
-                self._refresh_keyboard_hooks()
-            except Exception:
-                pass
 
         # Load click interval from settings if present
         try:
-            if config.has_section('Settings') and config['Settings'].get('click_interval'):
-                val = float(config['Settings'].get('click_interval'))
+            if settings.get('click_interval'):
+                val = float(settings['click_interval'])
                 # clamp to reasonable bounds
                 self.click_interval = max(0.05, min(5.0, val))
                 # update UI spinbox if available
@@ -1862,32 +2224,16 @@ class KeyMapperApp(QMainWindow):
             pass
 
         # Load saved clipboard ping monitor window match text if present
-        try:
-            if config.has_section('Settings') and config['Settings'].get('ip_monitor_window'):
-                try:
-                    txt = config['Settings'].get('ip_monitor_window', '')
-                    try:
-                        self.ip_monitor_window_entry.setText(txt)
-                    except Exception:
-                        # Some test doubles may expose text() but not setText
-                        try:
-                            # If it's a simple namespace with 'text' attr, write back
-                            if hasattr(self.ip_monitor_window_entry, 'text'):
-                                # no-op but leave attribute as-is
-                                pass
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        except Exception:
-            # Fail silently — incorrect value shouldn't crash loading
-            pass
+        if settings.get('ip_monitor_window'):
+            try:
+                self.ip_monitor_window_entry.setText(settings['ip_monitor_window'])
+            except Exception:
+                # Some test doubles may expose text() but not setText
+                pass
 
     def load_macros_from_config(self):
         """Load macros from macros.ini; macros are stored per-section with id = section name."""
-        config = configparser.ConfigParser()
+        config = configparser.ConfigParser(interpolation=None)
         config.optionxform = str
 
         config_path = self._get_macros_filepath()
@@ -1981,35 +2327,8 @@ class KeyMapperApp(QMainWindow):
 
     def _rebuild_macro_triggers_from_macros(self):
         """Ensure macro-trigger mappings are present for all loaded macros."""
-        # Nothing to do if we have no macros list
-        if not hasattr(self, 'macros'):
-            return
-
         modified = False
-        lock = getattr(self, 'mappings_lock', None)
-        ctx = lock if lock else None
-
-        def _enter_lock(l):
-            try:
-                if l:
-                    l.lock()
-            except Exception:
-                pass
-
-        def _exit_lock(l):
-            try:
-                if l:
-                    l.unlock()
-            except Exception:
-                pass
-
-        _enter_lock(ctx)
-        try:
-            if not hasattr(self, 'mappings'):
-                self.mappings = {}
-            if not hasattr(self, 'mapping_ids'):
-                self.mapping_ids = []
-
+        with QWriteLocker(self.mappings_lock):
             for macro in self.macros:
                 mid = macro.get('id')
                 trigger_type = macro.get('trigger_type', 'none')
@@ -2032,11 +2351,12 @@ class KeyMapperApp(QMainWindow):
                     self.mappings[window_title] = {}
 
                 self.mappings[window_title][mid] = details
-                if mid not in getattr(self, 'mapping_ids', []):
+                self._id_to_window[mid] = window_title
+                if mid not in self.mapping_ids:
                     self.mapping_ids.append(mid)
                 modified = True
-        finally:
-            _exit_lock(ctx)
+            if modified:
+                self._rebuild_trigger_indexes()
 
         if modified:
             try:
@@ -2044,7 +2364,7 @@ class KeyMapperApp(QMainWindow):
             except Exception:
                 pass
             # Refresh low-level hooks if enabled
-            if self._kbd_available and getattr(self, '_kbd_enabled', False):
+            if self._kbd_available and self._kbd_enabled:
                 try:
                     self._refresh_keyboard_hooks()
                 except Exception:
@@ -2069,57 +2389,78 @@ class KeyMapperApp(QMainWindow):
         # Build a fast lookup: source_key -> list of (window_title, target_key)
         # so callbacks don't need to iterate the entire mapping set each time.
         source_keys = set()
-        # If the object doesn't have a 'mappings' attribute (tests often
-        # create lightweight stubs), preserve any existing _source_index so
-        # callers that set it manually are not clobbered. Otherwise rebuild
-        # from the mappings attribute.
-        if not hasattr(self, 'mappings'):
-            if not hasattr(self, '_source_index'):
-                self._source_index = {}
-            source_keys = set(self._source_index.keys())
+        # The trigger index is rebuilt whenever the mappings change, so
+        # reuse it rather than rescanning every mapping under the lock. Its
+        # bucket lists are never mutated once built (edits swap in a whole
+        # new index), so they're shared as-is rather than copied.
+        kbd_index = getattr(self, '_kbd_index', None)
+        if kbd_index is not None and hasattr(self, 'mappings'):
+            if '' in kbd_index:
+                kbd_index = {sk: b for sk, b in kbd_index.items() if sk}
+            self._source_index = kbd_index
+            source_keys = set(kbd_index)
         else:
-            if not hasattr(self, '_source_index'):
+            # If the object doesn't have a 'mappings' attribute (tests often
+            # create lightweight stubs), preserve any existing _source_index so
+            # callers that set it manually are not clobbered. Otherwise rebuild
+            # from the mappings attribute.
+            if not hasattr(self, 'mappings'):
+                if not hasattr(self, '_source_index'):
+                    self._source_index = {}
+                source_keys = set(self._source_index.keys())
+            else:
+                # rebind rather than clear(): the previous dict may be a
+                # shared trigger index
                 self._source_index = {}
+            # Some tests (or lightweight shims) use a Dummy object without a
+            # mappings_lock. Be defensive: only lock when the attribute exists.
+            _mlock = getattr(self, 'mappings_lock', None)
+            if _mlock is not None:
+                with QReadLocker(_mlock):
+                    for mappings in getattr(self, 'mappings', {}).values():
+                        for details in mappings.values():
+                            if 'source_key' in details and details['source_key']:
+                                sk = details['source_key']
+                                source_keys.add(sk)
+                                # If this mapping is a macro entry it won't have a
+                                # target_key — store the full details dict so the
+                                # hook callback can enqueue the macro rather than
+                                # emitting None.
+                                if details.get('type') == 'macro':
+                                    self._source_index.setdefault(sk, []).append(
+                                        (details.get('window_title', '').strip().lower(), details)
+                                    )
+                                else:
+                                    self._source_index.setdefault(sk, []).append(
+                                        (details.get('window_title', '').strip().lower(), details.get('target_key'))
+                                    )
             else:
-                self._source_index.clear()
-        # Some tests (or lightweight shims) use a Dummy object without a
-        # mappings_lock. Be defensive: only lock when the attribute exists
-        # and exposes a .lock()/.unlock() API. This keeps test doubles
-        # and non-Qt shims from raising AttributeError during collection.
-        _mlock = getattr(self, 'mappings_lock', None)
-        if _mlock:
-            with QMutexLocker(_mlock):
                 for mappings in getattr(self, 'mappings', {}).values():
                     for details in mappings.values():
                         if 'source_key' in details and details['source_key']:
                             sk = details['source_key']
                             source_keys.add(sk)
-                            # If this mapping is a macro entry it won't have a
-                            # target_key — store the full details dict so the
-                            # hook callback can enqueue the macro rather than
-                            # emitting None.
                             if details.get('type') == 'macro':
                                 self._source_index.setdefault(sk, []).append(
-                                    (details.get('window_title', ''), details)
+                                    (details.get('window_title', '').strip().lower(), details)
                                 )
                             else:
                                 self._source_index.setdefault(sk, []).append(
-                                    (details.get('window_title', ''), details.get('target_key'))
+                                    (details.get('window_title', '').strip().lower(), details.get('target_key'))
                                 )
-        else:
-            for mappings in getattr(self, 'mappings', {}).values():
-                for details in mappings.values():
-                    if 'source_key' in details and details['source_key']:
-                        sk = details['source_key']
-                        source_keys.add(sk)
-                        if details.get('type') == 'macro':
-                            self._source_index.setdefault(sk, []).append(
-                                (details.get('window_title', ''), details)
-                            )
-                        else:
-                            self._source_index.setdefault(sk, []).append(
-                                (details.get('window_title', ''), details.get('target_key'))
-                            )
+
+        # Focus changes only need to know which keys each window uses
+        self._hook_keys_by_window = _source_keys_by_window(self._source_index)
+
+        # Normalize every send target now so the first matched press
+        # doesn't pay for it inside the hook
+        for bucket in self._source_index.values():
+            for _, tk in bucket:
+                if not isinstance(tk, dict):
+                    try:
+                        _kbd_send_name(tk)
+                    except Exception:
+                        pass
 
         # After rebuilding the index, update hooks to match the current
         # active window title (so only keys targeted to the current
@@ -2139,11 +2480,7 @@ class KeyMapperApp(QMainWindow):
 
         # Now build an index of active keys for the current active title and
         # ensure hooks are only installed for those.
-        try:
-            with self._active_title_lock:
-                active_title = self._cached_active_title
-        except Exception:
-            active_title = getattr(self, '_cached_active_title', '')
+        active_title = getattr(self, '_cached_active_title', '')
 
         # Only update hooks for keys that match the active title.
         if hasattr(self, '_update_hooks_for_active_title'):
@@ -2167,15 +2504,29 @@ class KeyMapperApp(QMainWindow):
         """
         if not self._kbd_available or not getattr(self, '_kbd_enabled', False):
             return
+        self._last_hook_title = active_title
+
+        # No keyboard mappings at all: nothing to match against
+        if not self._source_index:
+            if self._keyboard_hooks:
+                try:
+                    self._unhook_all_keyboard_hooks()
+                except Exception:
+                    pass
+                self._last_hook_title = active_title
+            return
 
-        # Compute keys that match the active title
+        # Compute keys that match the active title: one substring test per
+        # distinct mapped window rather than per mapping. Window titles are
+        # stored lowercased/stripped and the cached title is already lowered.
         active_keys = set()
         if active_title:
-            for sk, bucket in self._source_index.items():
-                for (w_title, _) in bucket:
-                    if w_title and (w_title.strip().lower() in active_title):
-                        active_keys.add(sk)
-                        break
+            by_window = getattr(self, '_hook_keys_by_window', None)
+            if by_window is None:
+                by_window = _source_keys_by_window(self._source_index)
+            for w_title, keys in by_window.items():
+                if w_title in active_title:
+                    active_keys |= keys
 
         # If no keys apply to the active window, remove hooks so keys pass
         # through normally without suppression or re-send delays.
@@ -2184,176 +2535,34 @@ class KeyMapperApp(QMainWindow):
                 self._unhook_all_keyboard_hooks()
             except Exception:
                 pass
+            # unhooking forgets the title; this state is still current for it
+            self._last_hook_title = active_title
             return
 
-        # Add hooks for newly active keys
-        for key in active_keys:
-            if key in self._keyboard_hooks:
-                continue
-
-            # create a stable callback closure
-            def make_callback(src_key):
-                def callback(event):
-                    # only handle key down
-                    if event.event_type != 'down':
-                        return
-
-                    # If a macro is running, any real user input should abort it
-                    try:
-                        if getattr(self, '_macro_running', False):
-                            now = time.time()
-                            last_injected = getattr(self, '_last_injected_event_time', 0.0)
-                            grace = getattr(self, '_synthetic_input_grace', 0.25)
-                            # Ignore likely synthetic events within the grace window
-                            if (now - last_injected) <= grace:
-                                return
-                            mt = getattr(self, 'macro_thread', None)
-                            if mt:
-                                try:
-                                    mt.abort_current_macro()
-                                except Exception:
-                                    pass
-                            try:
-                                self._diag_set_last_macro_event('Aborted: user input')
-                            except Exception:
-                                pass
-                            return
-                    except Exception:
-                        pass
-
-                    # periodically clean up expired ignore entries
-                    now = time.time()
-                    to_delete = [n for n, t in self._kbd_ignore.items() if t < now]
-                    for n in to_delete:
-                        del self._kbd_ignore[n]
-
-                    # If this press was caused by our own synthetic
-                    # input, ignore it here.
-                    if event.name in self._kbd_ignore:
-                        return
-
-                    # Quick safety: if any modifier key is held down
-                    # (ctrl/alt/shift/windows/meta) we SHOULD NOT
-                    # intercept this press — let hotkeys like Ctrl+C
-                    # behave normally. Re-send the original key so the
-                    # suppressed hardware event is delivered.
-                    try:
-                        if any(kbd.is_pressed(m) for m in ('ctrl', 'shift', 'alt', 'win', 'windows', 'meta', 'cmd')):
-                            # short ignore to avoid loop when re-sending
-                            expiry2 = time.time() + 0.25
-                            self._kbd_ignore[event.name] = expiry2
-                            kbd.send(event.name)
-                            return
-                    except Exception:
-                        # If checking modifier state fails for any reason
-                        # fall back to existing behavior and continue.
-                        pass
-
-                    # Use the cached active window title (updated periodically
-                    # on the GUI thread) instead of calling getActiveWindow()
-                    # inside the hot path.
-                    with self._active_title_lock:
-                        title = self._cached_active_title
-                    if not title:
-                        return
-
-                    # Look up matching mappings for this source key only
-                    bucket = self._source_index.get(src_key, [])
-                    for (w_title, tk) in bucket:
-                    # Only match when a non-empty mapping window title is
-                    # provided and is present as a substring in the
-                    # active window title (case-insensitive).
-                        if w_title and (w_title.strip().lower() in title.lower()):
-                            # Mark the target as ignored briefly to avoid
-                            # re-triggering our hooks when we inject synthetic
-                            # events. Normalize the target into the 'keyboard'
-                            # package format (e.g. 'ctrl+alt+d').
-                            # Shorter expiry — only needed to filter the
-                            # synthetic injected target key event so it
-                            # doesn't retrigger hooks.
-                            expiry = time.time() + 0.25
-
-                            # If this is a macro mapping, do not attempt to send
-                            # a stringified target (it's a dict). Instead, mark
-                            # the original source key as ignored briefly to avoid
-                            # re-triggering the hook when the macro generates
-                            # synthetic input, then enqueue the macro via the
-                            # mapping action signal.
-                            if isinstance(tk, dict) and tk.get('type') == 'macro':
-                                try:
-                                    # ignore the source key briefly
-                                    self._kbd_ignore[event.name] = expiry
-                                except Exception:
-                                    pass
-
-                                try:
-                                    self.mapping_action_signal.emit(tk)
-                                except Exception:
-                                    logging.exception('Failed to emit macro mapping action')
-
-                                return
-
-                            # Normal mapping (keyboard->target): compute the
-                            # normalized target name and record it so synthetic
-                            # events we inject don't cause hooks to retrigger.
-                            if isinstance(tk, Key):
-                                tn = tk.name
-                            else:
-                                # Convert space-padded "ctrl + alt + d" -> "ctrl+alt+d"
-                                tn = str(tk).replace(' + ', '+').replace(' ', '')
-
-                            # record the ignore entry and inject/send the
-                            # synthetic keypress only when we matched and
-                            # computed tn/expiry above.
-                            try:
-                                self._kbd_ignore[tn] = expiry
-                            except Exception:
-                                pass
-
-                            try:
-                                # Inject the mapped key using the keyboard package
-                                # directly for minimal latency.
-                                kbd.send(tn)
-                            except Exception:
-                                # Fallback: if send fails, emit to main thread
-                                # for the shared controller path.
-                                self.mapping_action_signal.emit(tk)
-
-                            return
-
-                    # No mapping matched for the active window — we
-                    # must re-emit the original source key so normal
-                    # behavior is preserved. The hook was installed with
-                    # suppress=True so the original hardware event was
-                    # swallowed by the library; here we send a synthetic
-                    # keypress which will be delivered to the active app.
-                    try:
-                        expiry2 = time.time() + 0.25
-                        self._kbd_ignore[event.name] = expiry2
-                        kbd.send(event.name)
-                    except Exception:
-                        # best-effort: if re-send fails nothing else to do
-                        pass
-
-                    return
-
-                return callback
+        # Only touch the delta: each hook/unhook is a round-trip into the
+        # keyboard library's global hook state
+        added = active_keys - self._keyboard_hooks.keys()
+        removed = self._keyboard_hooks.keys() - active_keys
+        if not added and not removed:
+            return
 
+        # Add hooks for newly active keys
+        for key in added:
             try:
-                handler = kbd.on_press_key(key, make_callback(key), suppress=True)
+                handler = kbd.on_press_key(
+                    key, functools.partial(self._on_source_key, key), suppress=True)
                 self._keyboard_hooks[key] = handler
             except Exception:
                 # Ignore failures adding a hook for a particular key.
                 pass
 
         # Unhook any active hooks for keys that are no longer matching
-        for k in list(self._keyboard_hooks.keys()):
-            if k not in active_keys:
-                try:
-                    kbd.unhook(self._keyboard_hooks[k])
-                except Exception:
-                    pass
-                del self._keyboard_hooks[k]
+        for k in removed:
+            try:
+                kbd.unhook(self._keyboard_hooks[k])
+            except Exception:
+                pass
+            del self._keyboard_hooks[k]
 
         # If the session/desktop has changed and our low-level hooks were
         # lost, ensure they are reinstalled now by calling _refresh_keyboard_hooks.
@@ -2372,6 +2581,122 @@ class KeyMapperApp(QMainWindow):
         except Exception:
             pass
 
+    def _on_source_key(self, src_key, event):
+        """Low-level 'keyboard' callback for a hooked source key.
+
+        The hook is installed with suppress=True; the 'keyboard' package
+        then delivers the original event only if the callback returns a
+        truthy value. Presses we don't remap return True so they go through
+        untouched, with no synthetic re-send.
+        """
+        # only handle key down
+        if event.event_type != 'down':
+            return
+        # One guard for the whole callback: on any unexpected failure, log it
+        # and let the original key through rather than swallowing it.
+        try:
+            ignore = self._kbd_ignore
+
+            # If a macro is running, any real user input should abort it
+            if self._macro_running:
+                # Ignore likely synthetic events within the grace window
+                if (time.time() - self._last_injected_event_time) <= self._synthetic_input_grace:
+                    return
+                if self.macro_thread:
+                    self.macro_thread.abort_current_macro()
+                self._diag_set_last_macro_event('Aborted: user input')
+                return
+
+            # One clock read serves both the ignore check and any expiry
+            # written below. Monotonic, so a wall-clock adjustment can't
+            # strand an entry.
+            now = time.monotonic()
+
+            # If this press was caused by our own synthetic
+            # input, pass it through without remapping it. Entries
+            # are expired lazily, only when their key comes up again.
+            ignore_until = ignore.get(event.name)
+            if ignore_until is not None:
+                if ignore_until >= now:
+                    return True
+                ignore.pop(event.name, None)
+
+            # Quick safety: if any modifier key is held down
+            # (ctrl/alt/shift/windows/meta) we SHOULD NOT
+            # intercept this press — let hotkeys like Ctrl+C
+            # behave normally by letting the original event through.
+            # is_pressed() is a lookup in the package's own key state, so
+            # it is cheap enough to ask on every press. Some of these
+            # names aren't mapped on every layout and raise ValueError.
+            try:
+                held = any(kbd.is_pressed(m) for m in ('ctrl', 'shift', 'alt', 'win', 'windows', 'meta', 'cmd'))
+            except ValueError:
+                held = False
+
+            # Use the cached active window title (updated periodically
+            # on the GUI thread) instead of calling getActiveWindow()
+            # inside the hot path.
+            title = self._cached_active_title
+
+            # Look up matching mappings for this source key only
+            tk = None
+            if title and not held:
+                for (w_title, action) in self._source_index.get(src_key, ()):
+                    # Only match when a non-empty mapping window title is
+                    # provided and is present as a substring in the
+                    # active window title. Both sides are already
+                    # lowercased, so there's no per-event normalization.
+                    if w_title and w_title in title:
+                        tk = action
+                        break
+
+            if tk is None:
+                # A modifier is held, there is no active title or no mapping
+                # matched this window: let the original press through so
+                # normal behavior (hotkeys like Ctrl+C included) is preserved.
+                return True
+
+            # Mark what we inject as ignored briefly so it doesn't
+            # retrigger our hooks. Short expiry — only needed to
+            # filter the synthetic event itself.
+            expiry = now + 0.25
+
+            # If this is a macro mapping, do not attempt to send
+            # a stringified target (it's a dict). Instead, mark
+            # the original source key as ignored briefly to avoid
+            # re-triggering the hook when the macro generates
+            # synthetic input, then enqueue the macro via the
+            # mapping action signal.
+            if isinstance(tk, dict) and tk.get('type') == 'macro':
+                _kbd_ignore_name(ignore, event.name, expiry)
+                self.mapping_action_signal.emit(tk)
+                return
+
+            # Normal mapping (keyboard->target): inject the target in the
+            # 'keyboard' package format (e.g. 'ctrl+alt+d') directly for
+            # minimal latency.
+            tn = _kbd_send_name(tk)
+            if tn:
+                _kbd_ignore_name(ignore, tn, expiry)
+                # Hand the send to the injector thread when it is running so
+                # the hook returns without waiting on the OS input queue. A
+                # stopped injector would drop it, so send inline instead.
+                injector = self._kbd_injector
+                if injector is not None and injector.isRunning():
+                    injector.submit(tn, tk)
+                    return
+                try:
+                    kbd.send(tn)
+                    return
+                except ValueError:
+                    # not a key name the 'keyboard' package knows
+                    pass
+            # Fallback: emit to main thread for the shared controller path.
+            self.mapping_action_signal.emit(tk)
+        except Exception:
+            logging.exception('s_mapper: low-level key callback failed')
+            return True
+
     def _unhook_all_keyboard_hooks(self):
         if not self._kbd_available:
             return
@@ -2382,6 +2707,7 @@ class KeyMapperApp(QMainWindow):
             except Exception:
                 pass
         self._keyboard_hooks.clear()
+        self._last_hook_title = None
 
     def _ensure_input_listeners(self):
         """
@@ -2389,20 +2715,35 @@ class KeyMapperApp(QMainWindow):
         and restart/refresh them if they were lost (e.g. by desktop lock/unlock).
         """
         try:
-            # Keyboard thread: ensure it is running, restart if not
-            kthread = getattr(self, 'keyboard_thread', None)
-            if not kthread or not getattr(kthread, 'isRunning', lambda: False)():
+            # Input listener threads: ensure they are running, restart if not
+            for attr, factory in (('keyboard_thread', self._new_keyboard_thread),
+                                  ('mouse_thread', self._new_mouse_thread)):
+                old = getattr(self, attr, None)
+                if old and getattr(old, 'isRunning', lambda: False)():
+                    continue
                 try:
-                    if kthread:
+                    if old:
                         try:
-                            kthread.stop()
+                            old.stop()
                         except Exception:
                             pass
-                    self.keyboard_thread = KeyboardListenerThread(self)
-                    self.keyboard_thread.start()
+                    new = factory()
+                    setattr(self, attr, new)
+                    new.start()
+                    # keep an active recording attached to the new listener
+                    rec = getattr(self, '_macro_recorder', None)
+                    if old and rec is not None:
+                        rec.reattach(old, new)
                 except Exception:
                     pass
 
+            # Key injector: restart it if it died; until then the hook
+            # sends inline
+            try:
+                self._ensure_key_injector()
+            except Exception:
+                pass
+
             # Macro thread: ensure it is running
             try:
                 if hasattr(self, '_ensure_macro_runtime'):
@@ -2418,11 +2759,7 @@ class KeyMapperApp(QMainWindow):
                     else:
                         # Proactively refresh hooks for current active title to
                         # recover from stale/lost hooks without needing a focus change.
-                        try:
-                            with self._active_title_lock:
-                                t = getattr(self, '_cached_active_title', '')
-                        except Exception:
-                            t = getattr(self, '_cached_active_title', '')
+                        t = getattr(self, '_cached_active_title', '')
                         try:
                             self._update_hooks_for_active_title(t)
                         except Exception:
@@ -2434,7 +2771,37 @@ class KeyMapperApp(QMainWindow):
             pass
 
 
+    def _schedule_persist(self, macros=False, mappings=False):
+        """Mark macros and/or mappings as needing a save and (re)start the
+        persist timer, so a run of edits is written to disk once."""
+        if macros:
+            self._macros_dirty = True
+        if mappings:
+            self._mappings_dirty = True
+        self._persist_timer.start()
+
+    def _flush_persist(self):
+        """Write whichever of macros/mappings were marked dirty."""
+        if self._macros_dirty:
+            self._macros_dirty = False
+            try:
+                self.save_macros_to_config()
+            except Exception:
+                pass
+        if self._mappings_dirty:
+            self._mappings_dirty = False
+            try:
+                self.save_mappings_to_config()
+            except Exception:
+                pass
+
     def closeEvent(self, event):
+        # Everything is written below; drop any pending coalesced save
+        try:
+            self._persist_timer.stop()
+        except Exception:
+            pass
+        self._macros_dirty = self._mappings_dirty = False
         try:
             # Save mappings and macros to disk before exit
             try:
@@ -2448,67 +2815,58 @@ class KeyMapperApp(QMainWindow):
         except Exception:
             pass
 
-        try:
-            for pt in list(getattr(self, '_ping_threads', [])):
-                try:
-                    pt.stop()
-                except Exception:
-                    pass
-            for pt in list(getattr(self, '_ping_threads', [])):
-                try:
-                    pt.wait(1000)
-                except Exception:
-                    pass
-        except Exception:
-            pass
+        # Stop listeners and wait for them. Every thread is asked to stop
+        # first and then all of them share one deadline, so shutdown takes
+        # as long as the slowest thread rather than the sum of them. If the
+        # listeners/workers don't stop in time, attempt stronger termination
+        # to avoid leaving background processes running after the GUI closes.
+        # (thread, name, terminate if it overruns)
+        threads = [(pt, 'ping_thread', False) for pt in list(getattr(self, '_ping_threads', []))]
+        threads += [
+            (getattr(self, 'keyboard_thread', None), 'keyboard_thread', True),
+            (getattr(self, 'mouse_thread', None), 'mouse_thread', True),
+            (getattr(self, 'macro_thread', None), 'macro_thread', True),
+            (getattr(self, '_kbd_injector', None), 'kbd_injector', True),
+            (getattr(self, '_ping_manager', None), 'ping_manager', True),
+            # If a recorder is active, try to stop and wait for it too
+            (getattr(self, '_macro_recorder', None), 'macro_recorder', True),
+            (getattr(self, '_active_watcher', None), 'active_watcher', False),
+        ]
+        threads = [t for t in threads if t[0]]
+
+        for thread_obj, name, _ in threads:
+            try:
+                thread_obj.stop()
+            except Exception:
+                logging.warning('s_mapper: failed to stop %s', name)
 
-        # Stop listeners and wait for them. If they don't stop in a reasonable
-        # time, attempt stronger termination to avoid leaving background
-        # processes running after the GUI closes.
-        def _stop_and_wait(thread_obj, name, timeout_ms=2000):
+        deadline = time.monotonic() + 2.0
+        for thread_obj, name, kill in threads:
             try:
-                if thread_obj:
+                remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+                if not thread_obj.wait(remaining_ms) and kill:
+                    # If wait returned False, try to terminate the thread
                     try:
-                        thread_obj.stop()
+                        thread_obj.terminate()
                     except Exception:
                         pass
                     try:
-                        if not thread_obj.wait(timeout_ms):
-                            # If wait returned False, try to terminate the thread
-                            try:
-                                thread_obj.terminate()
-                            except Exception:
-                                pass
-                            try:
-                                thread_obj.wait(500)
-                            except Exception:
-                                pass
+                        thread_obj.wait(500)
                     except Exception:
                         pass
             except Exception:
-                logging.warning(f's_mapper: failed to stop/kill {name}')
-
-        _stop_and_wait(getattr(self, 'keyboard_thread', None), 'keyboard_thread')
-        _stop_and_wait(getattr(self, 'mouse_thread', None), 'mouse_thread')
-        _stop_and_wait(getattr(self, 'macro_thread', None), 'macro_thread')
-        # If a recorder is active, try to stop and wait for it too
-        _stop_and_wait(getattr(self, '_macro_recorder', None), 'macro_recorder')
+                logging.warning('s_mapper: failed to stop/kill %s', name)
 
         try:
             self._active_title_timer.stop()
         except Exception:
             pass
-
         try:
-            if getattr(self, '_active_watcher', None):
-                try:
-                    self._active_watcher.stop()
-                except Exception:
-                    pass
-                try:
-                    self._active_watcher.wait(2000)
-                except Exception:
-                    pass
+            self._hook_refresh_timer.stop()
+        except Exception:
+            pass
+        try:
+            self._ping_hide_timer.stop()
         except Exception:
             pass
 
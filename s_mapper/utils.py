@@ -1,6 +1,7 @@
 import os
 import sys
 import re
+import html
 
 
 def _check_admin_windows() -> bool:
@@ -96,3 +97,35 @@ def parse_ping_output(output: str):
 
     color = 'red' if (lost_pct is not None and lost_pct >= 100) else 'green'
     return lost_pct, color
+
+
+def format_ping_html(ip_address: str, color: str, output: str) -> str:
+    """Return the HTML fragment shown in the ping log for one result.
+
+    The raw output is escaped so ping text can't inject markup.
+    """
+    header = f"--- Ping results for {ip_address} ---"
+    return (
+        f'<div style="color: {color}; font-family: \'Courier New\', Courier, monospace;">'
+        f'<b>{header}</b><br>'
+        f'<pre>{html.escape(output)}</pre>'
+        '</div>'
+    )
+
+
+def is_ipv4(text: str) -> bool:
+    """Return True if text is a dotted-quad IPv4 address like '10.0.0.1'.
+
+    A plain split/isdigit scan; cheaper than the regex engine for the
+    short strings seen on every clipboard change, and it also rejects
+    octets above 255.
+    """
+    if not text or not 7 <= len(text) <= 15:
+        return False
+    parts = text.split('.')
+    if len(parts) != 4:
+        return False
+    for p in parts:
+        if not (0 < len(p) <= 3 and p.isascii() and p.isdigit()) or int(p) > 255:
+            return False
+    return True
@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QListWidget, QTextBrowser, QLabel
@@ -7,12 +8,22 @@ from PyQt6.QtCore import Qt
 from .utils import resource_path
 
 
+@functools.lru_cache(maxsize=8)
+def app_icon(relative_path):
+    """Return the QIcon for a bundled asset, loading each file only once.
+
+    The main window, tray and help window share these; the cached icon may
+    be null if the asset is missing, so callers still check isNull().
+    """
+    return QIcon(resource_path(relative_path))
+
+
 class HelpWindow(QWidget):
     """Simple help viewer with a list of topics and an HTML content pane."""
     def __init__(self):
         super().__init__()
         self.setWindowTitle("S-Mapper Help")
-        self.setWindowIcon(QIcon(resource_path('assets/Square44x44Logo.png')))
+        self.setWindowIcon(app_icon('assets/Square44x44Logo.png'))
         self.setGeometry(200, 200, 700, 500)
         self.initUI()
 
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _fresh_shared_controller():
+    """Drop the cached shared keyboard Controller around every test, so a
+    test that monkeypatches keyboard.Controller gets its own stand-in."""
+    from s_mapper import threads
+    threads._shared_controller = None
+    yield
+    threads._shared_controller = None
@@ -7,8 +7,8 @@ m = importlib.import_module('s_mapper')
 
 def make_common_attrs():
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._active_title_lock = threading.Lock()
     # Provide safe default UI attributes used by _save_edited_mapping/_cancel_editing
     obj.source_keyboard_combobox = SimpleNamespace(currentText=lambda: '')
@@ -23,6 +23,14 @@ def make_common_attrs():
     # Provide a simple _exit_edit_mode implementation for tests that clears edit state
     obj._exit_edit_mode = lambda: setattr(obj, '_editing_mapping_id', None)
     obj.update_mappings_display = lambda: None
+    obj._kbd_index = {}
+    obj._mouse_index = {}
+    obj._kbd_available = False
+    obj._kbd_enabled = False
+    obj._rebuild_trigger_indexes = m.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, m.KeyMapperApp)
+    obj._apply_mapping_change = m.KeyMapperApp._apply_mapping_change.__get__(obj, m.KeyMapperApp)
+    obj._find_mapping_window = m.KeyMapperApp._find_mapping_window.__get__(obj, m.KeyMapperApp)
+    obj._drop_mapping = m.KeyMapperApp._drop_mapping.__get__(obj, m.KeyMapperApp)
     return obj
 
 
@@ -31,6 +39,7 @@ def test_save_edited_keyboard_mapping_moves_and_updates():
 
     # initial mapping in old window
     obj.mappings = {'oldwin': {'Mapping 1': {'source_key': 'a', 'target_key': 'b', 'window_title': 'oldwin'}}}
+    obj._id_to_window = {'Mapping 1': 'oldwin'}
     obj.mapping_ids = ['Mapping 1']
 
     obj._editing_mapping_id = 'Mapping 1'
@@ -62,6 +71,7 @@ def test_save_edited_mouse_mapping_moves_and_updates():
     obj = make_common_attrs()
 
     obj.mappings = {'oldwin': {'Mapping 1': {'mouse_button': 'left', 'press_count': 2, 'keyboard_button': 'z', 'window_title': 'oldwin'}}}
+    obj._id_to_window = {'Mapping 1': 'oldwin'}
     obj.mapping_ids = ['Mapping 1']
 
     obj._editing_mapping_id = 'Mapping 1'
@@ -87,10 +97,26 @@ def test_save_edited_mouse_mapping_moves_and_updates():
     assert d['window_title'] == 'newmousewin'
 
 
+def test_remove_mapping_drops_empty_window_group():
+    obj = make_common_attrs()
+    obj.mappings = {'win': {'Mapping 1': {'source_key': 'a', 'target_key': 'b', 'window_title': 'win'}}}
+    obj._id_to_window = {'Mapping 1': 'win'}
+    obj.mapping_ids = ['Mapping 1']
+    item = object()
+    obj.mappings_listbox = SimpleNamespace(currentItem=lambda: item, row=lambda it: 0)
+
+    m.KeyMapperApp.remove_mapping.__get__(obj, m.KeyMapperApp)()
+
+    assert obj.mapping_ids == []
+    assert obj.mappings == {}
+    assert obj._id_to_window == {}
+
+
 def test_cancel_edit_preserves_original_mapping():
     obj = make_common_attrs()
 
     obj.mappings = {'win': {'Mapping 1': {'source_key': 'a', 'target_key': 'b', 'window_title': 'win'}}}
+    obj._id_to_window = {'Mapping 1': 'win'}
     obj.mapping_ids = ['Mapping 1']
     obj._editing_mapping_id = 'Mapping 1'
 
@@ -116,6 +142,7 @@ def test_cancel_edit_preserves_original_mapping():
 def test_reject_save_without_target_key_for_keyboard(monkeypatch):
     obj = make_common_attrs()
     obj.mappings = {'win': {'Mapping 1': {'source_key': 'a', 'target_key': 'b', 'window_title': 'win'}}}
+    obj._id_to_window = {'Mapping 1': 'win'}
     obj.mapping_ids = ['Mapping 1']
     obj._editing_mapping_id = 'Mapping 1'
 
@@ -144,6 +171,7 @@ def test_reject_save_without_target_key_for_keyboard(monkeypatch):
 def test_reject_save_without_target_key_for_mouse(monkeypatch):
     obj = make_common_attrs()
     obj.mappings = {'win': {'Mapping 1': {'mouse_button': 'left', 'press_count': 1, 'keyboard_button': 'z', 'window_title': 'win'}}}
+    obj._id_to_window = {'Mapping 1': 'win'}
     obj.mapping_ids = ['Mapping 1']
     obj._editing_mapping_id = 'Mapping 1'
 
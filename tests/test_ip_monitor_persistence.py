@@ -5,13 +5,17 @@ def test_save_and_load_ip_monitor_window_field(monkeypatch, tmp_path):
     m = importlib.import_module('s_mapper')
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj.mappings = {}
     obj.mapping_ids = []
     obj._kbd_available = False
     obj._kbd_enabled = False
     obj.update_mappings_display = lambda: None
+    obj._kbd_index = {}
+    obj._mouse_index = {}
+    obj._rebuild_trigger_indexes = m.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, m.KeyMapperApp)
+    obj._apply_mapping_change = m.KeyMapperApp._apply_mapping_change.__get__(obj, m.KeyMapperApp)
     obj._refresh_macros_display = lambda: None
     obj._refresh_macros_display = lambda: None
     obj.ip_monitor_window_entry = type('E', (), {'text': lambda self: 'MyPingWin', 'setText': lambda self, v: setattr(obj, 'loaded_ip', v)})()
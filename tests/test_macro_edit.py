@@ -9,9 +9,21 @@ def make_macro_obj():
     # minimal attributes used by _save_edited_macro/_cancel_macro_editing
     obj.macros = []
     obj.macros_by_id = {}
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj.mappings = {}
     obj.mapping_ids = []
+    obj._id_to_window = {}
     obj._editing_macro_id = None
+    obj.update_mappings_display = lambda: None
+    obj._kbd_index = {}
+    obj._mouse_index = {}
+    obj._kbd_available = False
+    obj._kbd_enabled = False
+    obj._rebuild_trigger_indexes = m.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, m.KeyMapperApp)
+    obj._apply_mapping_change = m.KeyMapperApp._apply_mapping_change.__get__(obj, m.KeyMapperApp)
+    obj._find_mapping_window = m.KeyMapperApp._find_mapping_window.__get__(obj, m.KeyMapperApp)
+    obj._drop_mapping = m.KeyMapperApp._drop_mapping.__get__(obj, m.KeyMapperApp)
     # UI fields
     obj.macro_name_entry = SimpleNamespace(text=lambda: '')
     obj.macro_actions_text = SimpleNamespace(toPlainText=lambda: '')
@@ -21,13 +33,31 @@ def make_macro_obj():
     obj.macro_mouse_button_combobox = SimpleNamespace(currentText=lambda: '')
     obj.macro_mouse_presses = SimpleNamespace(value=lambda: 1)
     obj.macro_trigger_window_entry = SimpleNamespace(text=lambda: '')
-    obj._add_mapping_details = lambda details, mapping_id=None: setattr(obj, '_last_added_mapping', (details, mapping_id))
     obj._refresh_macros_display = lambda: None
     obj.add_macro_button = SimpleNamespace(setText=lambda s: setattr(obj, '_add_text', s))
     obj.cancel_macro_edit_button = SimpleNamespace(setVisible=lambda v: setattr(obj, '_cancel_visible', v))
+    obj._collect_macro_from_form = m.KeyMapperApp._collect_macro_from_form.__get__(obj, m.KeyMapperApp)
+    obj._persist_timer = SimpleNamespace(start=lambda: None)
+    obj._schedule_persist = m.KeyMapperApp._schedule_persist.__get__(obj, m.KeyMapperApp)
     return obj
 
 
+def test_collect_macro_from_form_reports_missing_name():
+    obj = make_macro_obj()
+    collect = m.KeyMapperApp._collect_macro_from_form.__get__(obj, m.KeyMapperApp)
+
+    macro, error = collect('Macro 1')
+    assert macro is None and error
+
+    obj.macro_name_entry = SimpleNamespace(text=lambda: ' named ')
+    obj.macro_actions_text = SimpleNamespace(toPlainText=lambda: 'text:a\n\n  key:enter ')
+    macro, error = collect('Macro 1')
+    assert error is None
+    assert macro['name'] == 'named'
+    assert macro['actions'] == ['text:a', 'key:enter']
+    assert macro['trigger_type'] == 'none'
+
+
 def test_save_edited_macro_updates_macro_and_mapping():
     obj = make_macro_obj()
 
@@ -54,11 +84,12 @@ def test_save_edited_macro_updates_macro_and_mapping():
     assert obj.macros_by_id['Macro 1']['actions'] == ['text:Hello']
 
     # mapping was added for macro id
-    assert getattr(obj, '_last_added_mapping', None) is not None
-    details, mapping_id = obj._last_added_mapping
-    assert mapping_id == 'Macro 1'
+    details = obj.mappings['win']['Macro 1']
+    assert obj._id_to_window['Macro 1'] == 'win'
     assert details['type'] == 'macro'
     assert details['source_key'] == 'g'
+    # and the new trigger is indexed for the listeners
+    assert obj._kbd_index['g'][0][0] == 'win'
 
 
 def test_cancel_macro_editing_clears_edit_state_and_preserves_macro():
@@ -1,6 +1,8 @@
 import importlib
 import time
 
+from PyQt6.QtCore import Qt
+
 
 def test_macro_thread_sets_app_flag_and_respects_order(monkeypatch):
     # Import MacroThread class
@@ -273,8 +275,8 @@ def test_ui_on_press_triggers_macro_abort():
     threads_mod = importlib.import_module('s_mapper.threads')
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._macro_running = True
     # attach a fake macro_thread with spy
     class FakeMT:
@@ -298,8 +300,8 @@ def test_ui_does_not_abort_on_synthetic_input():
     mod_ui = importlib.import_module('s_mapper.ui')
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._macro_running = True
     # attach a fake macro_thread with spy
     class FakeMT:
@@ -321,3 +323,200 @@ def test_ui_does_not_abort_on_synthetic_input():
 
     # abort should NOT have been called since event is synthetic
     assert obj.macro_thread.called is False
+
+
+def test_held_skips_modifier_that_fails_to_press():
+    mod = importlib.import_module('s_mapper.threads')
+    # plain names: with the dummy pynput backend every Key member compares equal
+    ops = []
+
+    class FlakyController:
+        def press(self, k):
+            if k == 'alt':
+                raise RuntimeError('cannot press alt')
+            ops.append(('press', k))
+
+        def release(self, k):
+            ops.append(('release', k))
+
+    ctl = FlakyController()
+    with mod._held(ctl, ['ctrl', 'alt', 'shift']):
+        ops.append(('main', 'x'))
+
+    # alt is skipped, the rest of the combo still goes out, and only the
+    # pressed modifiers are released (in reverse order)
+    assert ops == [
+        ('press', 'ctrl'), ('press', 'shift'),
+        ('main', 'x'),
+        ('release', 'shift'), ('release', 'ctrl'),
+    ]
+
+
+def test_compile_macro_resolves_actions_once(monkeypatch):
+    mod = importlib.import_module('s_mapper.threads')
+    monkeypatch.setattr(mod.keyboard, 'Controller', lambda: object())
+    mt = mod.MacroThread(app=None)
+
+    ops = mt._compile_macro([
+        'text:hi', 'sleep:0.5', 'sleep:bad', 'key:enter', 'key:ctrl + n',
+        'key:"Key.tab"', 'key:+', 'noprefix', 42,
+    ])
+
+    # resolve expectations through the module tables: the dummy pynput
+    # backend aliases every Key member, so only some names are present
+    special = mod._SPECIAL_KEYS
+    kinds = [op[0] for op in ops]
+    # the invalid sleep is dropped with a warning
+    assert kinds == ['text', 'sleep', 'key', 'combo', 'key', 'text', 'unknown', 'unknown']
+    assert ops[0] == ('text', 'hi')
+    assert ops[1] == ('sleep', 0.5)
+    # enter resolves to the Key member and asks for the longer pause
+    assert ops[2][1] == special.get('enter', 'enter') and ops[2][2] is True
+    # modifier combo: modifiers list, main key, no enter pause
+    assert ops[3][1] == [mod._MOD_MAP['ctrl']] and ops[3][2] == 'n' and ops[3][3] is False
+    # quoted / Key.-prefixed names are normalized
+    assert ops[4][1] == special.get('tab', 'tab')
+    # a payload that splits into nothing is typed literally
+    assert ops[5] == ('text', '+')
+    assert ops[6] == ('unknown', 'noprefix') and ops[7] == ('unknown', 42)
+
+
+def _recording_thread(mod, monkeypatch, app):
+    ops = []
+
+    class DummyController:
+        def type(self, s):
+            ops.append(('type', s))
+
+        def press(self, k):
+            ops.append(('press', k))
+
+        def release(self, k):
+            ops.append(('release', k))
+
+    monkeypatch.setattr(mod.keyboard, 'Controller', lambda: DummyController())
+    return mod.MacroThread(app=app, private_controller=True), ops
+
+
+def _wait_for(pred, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return pred()
+
+
+def test_macro_abort_ends_current_macro_but_keeps_thread(monkeypatch):
+    mod = importlib.import_module('s_mapper.threads')
+    app = type('A', (), {})()
+    app._macro_running = False
+    mt, ops = _recording_thread(mod, monkeypatch, app)
+
+    mt.enqueue_macro({'id': 'a', 'name': 'a', 'actions': ['sleep:5', 'text:NOPE']})
+    mt.start()
+    try:
+        assert _wait_for(lambda: app._macro_running)
+        started = time.monotonic()
+        mt.abort_current_macro()
+        # the 5 s sleep is woken immediately and the macro is abandoned
+        assert _wait_for(lambda: not app._macro_running, timeout=1.0)
+        assert time.monotonic() - started < 1.0
+        assert ('type', 'NOPE') not in ops
+
+        # the abort bit is cleared for the next macro, which runs normally
+        mt.enqueue_macro({'id': 'b', 'name': 'b', 'actions': ['text:OK']})
+        assert _wait_for(lambda: ('type', 'OK') in ops)
+        assert mt.isRunning()
+    finally:
+        mt.stop()
+        mt.wait(2000)
+
+
+def test_macro_stop_wakes_sleep_and_drops_queued_work(monkeypatch):
+    mod = importlib.import_module('s_mapper.threads')
+    app = type('A', (), {})()
+    app._macro_running = False
+    mt, ops = _recording_thread(mod, monkeypatch, app)
+
+    mt.enqueue_macro({'id': 'a', 'name': 'a', 'actions': ['sleep:5', 'text:NOPE']})
+    mt.enqueue_macro({'id': 'b', 'name': 'b', 'actions': ['text:QUEUED']})
+    mt.start()
+    assert _wait_for(lambda: app._macro_running)
+
+    started = time.monotonic()
+    mt.stop()
+    assert mt.wait(2000)
+    assert time.monotonic() - started < 1.5
+    assert not any(op[0] == 'type' for op in ops)
+    assert mt._queue.empty()
+
+
+def test_recorder_follows_restarted_listener():
+    mod = importlib.import_module('s_mapper.threads')
+
+    class Host(mod._RecorderHostMixin):
+        def isRunning(self):
+            return True
+
+    old, new = Host(), Host()
+    rec = mod.MacroRecorder(keyboard_thread=old)
+    got = []
+    rec.recorded.connect(got.append, type=Qt.ConnectionType.DirectConnection)
+    rec.start()
+    try:
+        assert _wait_for(lambda: len(old._recorders) == 1)
+        # the app replaces the dead listener while recording
+        rec.reattach(old, new)
+        assert old._recorders == ()
+        assert len(new._recorders) == 1
+        new._notify_recorders(mod.keyboard.KeyCode.from_char('a'))
+    finally:
+        rec.stop()
+        assert rec.wait(2000)
+    # detached from the listener that hosts it now, not the dead one
+    assert new._recorders == ()
+    assert got and 'text:a' in got[0]
+
+
+def _pending_ids(mt):
+    return [m.get('id') for m in list(mt._queue.queue)]
+
+
+def test_macro_queue_is_bounded_and_drops_oldest(monkeypatch):
+    mod = importlib.import_module('s_mapper.threads')
+    monkeypatch.setattr(mod.MacroThread, 'MAX_PENDING', 3)
+    mt, _ = _recording_thread(mod, monkeypatch, None)
+
+    for i in range(5):
+        mt.enqueue_macro({'id': f'm{i}', 'name': f'm{i}', 'actions': ['text:x']})
+
+    # never more than MAX_PENDING waiting; the newest ones are kept
+    assert mt._queue.qsize() == 3
+    assert _pending_ids(mt) == ['m2', 'm3', 'm4']
+
+
+def test_macro_queue_coalesces_repeats_only_when_enabled(monkeypatch):
+    mod = importlib.import_module('s_mapper.threads')
+    mt, _ = _recording_thread(mod, monkeypatch, None)
+    a = {'id': 'a', 'name': 'a', 'actions': ['text:x']}
+    b = {'id': 'b', 'name': 'b', 'actions': ['text:y']}
+
+    # off by default: auto-repeat queues every press
+    mt.enqueue_macro(a)
+    mt.enqueue_macro(a)
+    assert _pending_ids(mt) == ['a', 'a']
+
+    mt.stop()
+    mt, _ = _recording_thread(mod, monkeypatch, None)
+    mt.coalesce_repeats = True
+    mt.enqueue_macro(a)
+    mt.enqueue_macro(a)
+    # only the last waiting macro is compared, so a later repeat of `a`
+    # behind `b` still queues
+    mt.enqueue_macro(b)
+    mt.enqueue_macro(a)
+    # macros without an id are never coalesced
+    mt.enqueue_macro({'name': 'anon', 'actions': []})
+    mt.enqueue_macro({'name': 'anon', 'actions': []})
+    assert _pending_ids(mt) == ['a', 'b', 'a', None, None]
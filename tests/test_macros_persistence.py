@@ -85,6 +85,18 @@ window_title =
     assert obj.mapping_counter > 99
 
 
+class DummyTimer:
+    def __init__(self):
+        self.starts = 0
+        self.stopped = False
+
+    def start(self):
+        self.starts += 1
+
+    def stop(self):
+        self.stopped = True
+
+
 def test_remove_selected_macro_deletes_mapping_and_saves(monkeypatch, tmp_path):
     m = importlib.import_module('s_mapper')
     from types import SimpleNamespace
@@ -95,6 +107,18 @@ def test_remove_selected_macro_deletes_mapping_and_saves(monkeypatch, tmp_path):
     obj.macros = [macro]
     obj.macros_by_id = {'Macro 1': macro}
     obj.mappings = {'somewin': {'Macro 1': {'type': 'macro', 'macro_id': 'Macro 1', 'window_title': 'somewin'}}}
+    obj._id_to_window = {'Macro 1': 'somewin'}
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
+    obj.update_mappings_display = lambda: None
+    obj._kbd_index = {}
+    obj._mouse_index = {}
+    obj._kbd_available = False
+    obj._kbd_enabled = False
+    obj._rebuild_trigger_indexes = m.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, m.KeyMapperApp)
+    obj._apply_mapping_change = m.KeyMapperApp._apply_mapping_change.__get__(obj, m.KeyMapperApp)
+    obj._find_mapping_window = m.KeyMapperApp._find_mapping_window.__get__(obj, m.KeyMapperApp)
+    obj._drop_mapping = m.KeyMapperApp._drop_mapping.__get__(obj, m.KeyMapperApp)
     obj.macros_listbox = SimpleNamespace(currentRow=lambda: 0)
     obj._refresh_macros_display = lambda: None
 
@@ -102,11 +126,53 @@ def test_remove_selected_macro_deletes_mapping_and_saves(monkeypatch, tmp_path):
     obj.save_macros_to_config = lambda: called.update({'macros_saved': True})
     obj.save_mappings_to_config = lambda: called.update({'mappings_saved': True})
 
+    obj._persist_timer = DummyTimer()
+    obj._schedule_persist = m.KeyMapperApp._schedule_persist.__get__(obj, m.KeyMapperApp)
+    obj._flush_persist = m.KeyMapperApp._flush_persist.__get__(obj, m.KeyMapperApp)
+
     handler = m.KeyMapperApp._remove_selected_macro.__get__(obj, m.KeyMapperApp)
     handler()
 
     # mapping removed
     assert 'Macro 1' not in obj.mappings.get('somewin', {})
-    # persistence attempted
+    # persistence scheduled, then written when the timer fires
+    assert obj._persist_timer.starts == 1
+    obj._flush_persist()
     assert called['macros_saved'] is True
     assert called['mappings_saved'] is True
+
+
+def test_persist_coalesces_edits_and_close_flushes():
+    m = importlib.import_module('s_mapper')
+
+    obj = type('O', (), {})()
+    obj._macros_dirty = obj._mappings_dirty = False
+    obj._persist_timer = DummyTimer()
+    writes = []
+    obj.save_macros_to_config = lambda: writes.append('macros')
+    obj.save_mappings_to_config = lambda: writes.append('mappings')
+    schedule = m.KeyMapperApp._schedule_persist.__get__(obj, m.KeyMapperApp)
+    flush = m.KeyMapperApp._flush_persist.__get__(obj, m.KeyMapperApp)
+
+    # a burst of edits only restarts the timer
+    schedule(macros=True)
+    schedule(macros=True, mappings=True)
+    schedule(macros=True)
+    assert obj._persist_timer.starts == 3
+    assert writes == []
+
+    # one write per file when it fires; a stray second timeout is a no-op
+    flush()
+    flush()
+    assert sorted(writes) == ['macros', 'mappings']
+
+    # an edit still pending at exit is written by closeEvent, not the timer
+    writes.clear()
+    schedule(macros=True)
+    obj._unhook_all_keyboard_hooks = lambda: None
+    close = m.KeyMapperApp.closeEvent.__get__(obj, m.KeyMapperApp)
+    close(type('E', (), {'accept': lambda self: None})())
+    assert obj._persist_timer.stopped is True
+    assert sorted(writes) == ['macros', 'mappings']
+    flush()
+    assert sorted(writes) == ['macros', 'mappings']
@@ -3,6 +3,7 @@ import threading
 from types import SimpleNamespace
 
 m = importlib.import_module('s_mapper')
+ui = importlib.import_module('s_mapper.ui')
 
 
 class DummySignal:
@@ -23,13 +24,16 @@ class DummySignal:
 def make_obj_for_keypress():
     obj = type('O', (), {})()
     # minimal attributes used by on_press
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = False
     obj._kbd_enabled = False
     obj._active_title_lock = threading.Lock()
     obj._cached_active_title = 'mywindow'
     obj.mappings = {'mywindow': {'Mapping 1': {'source_key': 'q', 'target_key': 'x', 'window_title': 'mywindow'}}}
+    obj._kbd_index, obj._mouse_index = ui._build_trigger_indexes(obj.mappings)
+    obj._kbd_title_match = obj._mouse_title_match = None
+    obj._windows_in_title = m.KeyMapperApp._windows_in_title
     # replace signal with simple object that records the emitted value
     calls = []
     class DummyEmitter:
@@ -56,14 +60,17 @@ def test_keyboard_mapping_triggers_action():
 
 def test_mouse_mapping_triggers_action():
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._active_title_lock = threading.Lock()
     obj._cached_active_title = 'mywindow'
     obj.click_interval = 0.6
     obj.last_click_time = {}
     obj.click_counts = {}
     obj.mappings = {'mywindow': {'Mapping 1': {'mouse_button': 'left', 'press_count': 1, 'keyboard_button': 'z', 'window_title': 'mywindow'}}}
+    obj._kbd_index, obj._mouse_index = ui._build_trigger_indexes(obj.mappings)
+    obj._kbd_title_match = obj._mouse_title_match = None
+    obj._windows_in_title = m.KeyMapperApp._windows_in_title
 
     # minimal emitter and recorder
     calls = []
@@ -83,14 +90,30 @@ def test_mouse_mapping_triggers_action():
     assert calls[0][0][0] == 'z'
 
 
+def test_keyboard_mapping_uses_prebuilt_trigger_index():
+    obj, calls = make_obj_for_keypress()
+    obj.mappings['otherwindow'] = {'Mapping 2': {'source_key': 'Q ', 'target_key': 'y', 'window_title': 'otherwindow'}}
+    from s_mapper import ui
+    obj._kbd_index, obj._mouse_index = ui._build_trigger_indexes(obj.mappings)
+    # index entries are lowercased and kept in mapping order
+    assert [w for w, _ in obj._kbd_index['q']] == ['mywindow', 'otherwindow']
+
+    press = m.KeyMapperApp.on_press.__get__(obj, m.KeyMapperApp)
+    obj._cached_active_title = 'otherwindow'
+    press(SimpleNamespace(name='q'))
+
+    assert len(calls) == 1
+    assert calls[0][0][0] == 'y'
+
+
 def test_refresh_keyboard_hooks_handles_macro_mappings():
     """_refresh_keyboard_hooks should index macro mappings by source_key and
     store the full mapping dict in the bucket (not None) so low-level hooks
     can hand the dict to the handler without causing NoneType errors.
     """
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = True
     # Keep hooks disabled so the _update_hooks_for_active_title fast-exit
     obj._kbd_enabled = False
@@ -141,14 +164,17 @@ def test_macro_trigger_from_key_can_fire_multiple_times():
     # Simulate repeated key presses bound to a macro; ensure each press
     # results in the macro being enqueued.
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = False
     obj._active_title_lock = __import__('threading').Lock()
     obj._cached_active_title = 'mywindow'
 
     # mapping is a macro mapping stored under the target window
     obj.mappings = {'mywindow': {'Macro 1': {'type': 'macro', 'macro_id': 'Macro 1', 'source_key': 'q', 'window_title': 'mywindow', 'actions': ['text:ok']}}}
+    obj._kbd_index, obj._mouse_index = ui._build_trigger_indexes(obj.mappings)
+    obj._kbd_title_match = obj._mouse_title_match = None
+    obj._windows_in_title = m.KeyMapperApp._windows_in_title
 
     # provide macros_by_id so handler can look up macro
     obj.macros_by_id = {'Macro 1': {'id': 'Macro 1', 'name': 'RepeatMacro', 'actions': ['text:ok']}}
@@ -192,12 +218,17 @@ def test_macro_trigger_from_key_can_fire_multiple_times():
 
 def test_rebuild_macro_triggers_populates_mappings():
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj.mappings = {}
     obj.mapping_ids = []
+    obj._id_to_window = {}
+    obj._kbd_index = {}
+    obj._mouse_index = {}
     obj._kbd_available = False
     obj._kbd_enabled = False
+    obj.update_mappings_display = lambda: None
+    obj._rebuild_trigger_indexes = m.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, m.KeyMapperApp)
 
     # two macros: keyboard trigger and mouse trigger
     obj.macros = [
@@ -218,8 +249,8 @@ def test_low_level_hook_aborts_running_macro(monkeypatch):
     from s_mapper.ui import KeyMapperApp
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = True
     obj._kbd_enabled = True
     obj._active_title_lock = __import__('threading').Lock()
@@ -229,6 +260,9 @@ def test_low_level_hook_aborts_running_macro(monkeypatch):
     obj._kbd_ignore = {}
     obj._macro_running = True
     obj._last_injected_event_time = 0.0
+    obj._synthetic_input_grace = 0.25
+    obj._kbd_injector = None
+    obj._diag_set_last_macro_event = lambda msg: None
     aborted = {'called': False}
 
     class DummyMacroThread:
@@ -252,6 +286,7 @@ def test_low_level_hook_aborts_running_macro(monkeypatch):
 
     obj._update_hooks_for_active_title = KeyMapperApp._update_hooks_for_active_title.__get__(obj, KeyMapperApp)
     obj._refresh_keyboard_hooks = KeyMapperApp._refresh_keyboard_hooks.__get__(obj, KeyMapperApp)
+    obj._on_source_key = KeyMapperApp._on_source_key.__get__(obj, KeyMapperApp)
 
     obj._refresh_keyboard_hooks()
 
@@ -270,8 +305,8 @@ def test_low_level_hook_callback_enqueues_macro_multiple_times(monkeypatch):
     fake event. The macro should be enqueued both times.
     """
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = True
     obj._kbd_enabled = True
     obj._active_title_lock = __import__('threading').Lock()
@@ -310,6 +345,10 @@ def test_low_level_hook_callback_enqueues_macro_multiple_times(monkeypatch):
     obj._source_index = {}
     obj._keyboard_hooks = {}
     obj._kbd_ignore = {}
+    obj._kbd_injector = None
+    obj._macro_running = False
+    obj._last_injected_event_time = 0.0
+    obj._synthetic_input_grace = 0.25
 
     captured = {}
 
@@ -325,6 +364,7 @@ def test_low_level_hook_callback_enqueues_macro_multiple_times(monkeypatch):
 
     # Make sure the nested update function is available on the dummy object
     obj._update_hooks_for_active_title = KeyMapperApp._update_hooks_for_active_title.__get__(obj, KeyMapperApp)
+    obj._on_source_key = KeyMapperApp._on_source_key.__get__(obj, KeyMapperApp)
 
     # Now call the method to build hooks — it should call our fake_on_press_key
     refresh = KeyMapperApp._refresh_keyboard_hooks.__get__(obj, KeyMapperApp)
@@ -351,8 +391,8 @@ def test_keyboard_hook_skips_unmatched_active_window(monkeypatch):
     from s_mapper.ui import KeyMapperApp
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = True
     obj._kbd_enabled = True
     obj._active_title_lock = __import__('threading').Lock()
@@ -403,8 +443,8 @@ def test_macro_running_flag_blocks_mappings():
     from s_mapper.ui import KeyMapperApp
 
     obj = type('O', (), {})()
-    from PyQt6.QtCore import QMutex
-    obj.mappings_lock = QMutex()
+    from PyQt6.QtCore import QReadWriteLock
+    obj.mappings_lock = QReadWriteLock()
     obj._kbd_available = False
     obj._kbd_enabled = False
     obj._active_title_lock = __import__('threading').Lock()
@@ -585,3 +625,156 @@ def test_on_clipboard_change_ignores_non_ip(monkeypatch):
     call()
 
     assert called['ping'] is False
+
+
+def test_title_poll_stops_once_watcher_is_hooked():
+    from PyQt6.QtCore import QObject, pyqtSignal
+    from s_mapper.ui import KeyMapperApp
+
+    class Timer:
+        active = True
+
+        def stop(self):
+            self.active = False
+
+    class Watcher(QObject):
+        hook_installed = pyqtSignal()
+
+    obj = type('O', (), {})()
+    obj._active_title_timer = Timer()
+    watcher = Watcher()
+    watcher.hook_installed.connect(KeyMapperApp._on_active_watcher_hooked.__get__(obj, KeyMapperApp))
+
+    # the poll is the fallback until the watcher's hooks are in place
+    assert obj._active_title_timer.active
+    watcher.hook_installed.emit()
+    assert not obj._active_title_timer.active
+
+
+def test_mouse_only_change_skips_keyboard_hook_refresh():
+    from s_mapper import ui
+    from PyQt6.QtCore import QReadWriteLock
+    obj = type('O', (), {})()
+    obj.mappings_lock = QReadWriteLock()
+    obj.mappings = {'win': {'Mapping 1': {'source_key': 'a', 'target_key': 'b', 'window_title': 'win'}}}
+    obj._kbd_index, obj._mouse_index = ui._build_trigger_indexes(obj.mappings)
+    obj._kbd_available = True
+    obj._kbd_enabled = True
+    obj.update_mappings_display = lambda: None
+    refreshes = []
+    obj._refresh_keyboard_hooks = lambda: refreshes.append(True)
+    obj._rebuild_trigger_indexes = ui.KeyMapperApp._rebuild_trigger_indexes.__get__(obj, ui.KeyMapperApp)
+    apply_change = ui.KeyMapperApp._apply_mapping_change.__get__(obj, ui.KeyMapperApp)
+
+    def add_mouse():
+        obj.mappings['win']['Mapping 2'] = {'mouse_button': 'left', 'press_count': 1, 'keyboard_button': 'z', 'window_title': 'win'}
+
+    assert apply_change(add_mouse)
+    assert refreshes == []
+    assert 'left' in obj._mouse_index
+
+    def add_key():
+        obj.mappings['win']['Mapping 3'] = {'source_key': 'c', 'target_key': 'd', 'window_title': 'win'}
+
+    apply_change(add_key)
+    assert refreshes == [True]
+
+
+def test_key_injector_thread_sends_in_order_and_reports_failures():
+    from PyQt6.QtCore import Qt
+    mod = importlib.import_module('s_mapper.threads')
+    sent = []
+
+    def send(name):
+        if name == 'bogus':
+            raise ValueError(name)
+        sent.append(name)
+
+    inj = mod.KeyInjectorThread(send)
+    failed = []
+    # no event loop here, so deliver the signal on the injector thread
+    inj.send_failed.connect(failed.append, type=Qt.ConnectionType.DirectConnection)
+    for name in ('a', 'bogus', 'ctrl+b'):
+        inj.submit(name, {'target_key': name})
+    inj.start()
+    inj.stop()
+    assert inj.wait(1000)
+
+    assert sent == ['a', 'ctrl+b']
+    assert failed == [{'target_key': 'bogus'}]
+
+
+def _source_key_app(monkeypatch, pressed, sent):
+    """Stub app with _on_source_key bound, mapping q -> x in 'mywindow', and
+    a 'keyboard' stub whose is_pressed() reports the keys in `pressed`."""
+    from s_mapper.ui import KeyMapperApp
+    ui_mod = importlib.import_module('s_mapper.ui')
+
+    obj = type('O', (), {})()
+    obj._cached_active_title = 'mywindow'
+    obj._source_index = {'q': [('mywindow', 'x')]}
+    obj._kbd_ignore = {}
+    obj._kbd_injector = None
+    obj._macro_running = False
+    obj._last_injected_event_time = 0.0
+    obj._synthetic_input_grace = 0.25
+    obj.macro_thread = None
+    obj.mapping_action_signal = type('S', (), {'emit': lambda self, v: sent.append(('emit', v))})()
+    obj._on_source_key = KeyMapperApp._on_source_key.__get__(obj, KeyMapperApp)
+
+    monkeypatch.setattr(ui_mod, 'kbd', type('K', (), {
+        'is_pressed': staticmethod(lambda name: name in pressed),
+        'send': staticmethod(lambda name: sent.append(('send', name))),
+    }))
+    return obj
+
+
+def test_source_key_passes_through_while_modifier_held(monkeypatch):
+    pressed, sent = set(), []
+    obj = _source_key_app(monkeypatch, pressed, sent)
+
+    def event(name, kind):
+        # the 'keyboard' package updates its key state before callbacks run
+        if kind == 'down':
+            pressed.add(name)
+        else:
+            pressed.discard(name)
+        return type('E', (), {'event_type': kind, 'name': name})()
+
+    event('ctrl', 'down')
+    # Ctrl+Q is left alone: the original press goes through, nothing is sent
+    assert obj._on_source_key('q', event('q', 'down')) is True
+    obj._on_source_key('q', event('q', 'up'))
+    assert sent == []
+
+    event('ctrl', 'up')
+    # with the modifier released the next press is remapped and suppressed
+    assert not obj._on_source_key('q', event('q', 'down'))
+    assert sent == [('send', 'x')]
+
+
+def test_source_key_sends_inline_when_injector_stopped(monkeypatch):
+    sent = []
+    obj = _source_key_app(monkeypatch, set(), sent)
+    submitted = []
+
+    class Injector:
+        running = False
+
+        def isRunning(self):
+            return self.running
+
+        def submit(self, name, action):
+            submitted.append(name)
+
+    obj._kbd_injector = Injector()
+    down = type('E', (), {'event_type': 'down', 'name': 'q'})()
+
+    # a dead injector would drop the key; send it from the hook instead
+    obj._on_source_key('q', down)
+    assert sent == [('send', 'x')] and submitted == []
+
+    obj._kbd_injector.running = True
+    obj._kbd_ignore.clear()
+    obj._on_source_key('q', down)
+    assert submitted == ['x'] and len(sent) == 1
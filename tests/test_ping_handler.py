@@ -25,10 +25,20 @@ class DummyClipboard:
     def text(self):
         return '127.0.0.1'
 
+class DummyTab:
+    def isVisible(self):
+        return True
+
 class DummyApp:
+    _show_ping_html = KeyMapperApp._show_ping_html
+    _flush_ping_html = KeyMapperApp._flush_ping_html
+
     def __init__(self):
         self.ping_output_view = DummyPingOutput()
         self.clipboard = DummyClipboard()
+        self._ping_html_buffer = []
+        self._ping_flush_pending = False
+        self._ping_log_tab = DummyTab()
         self._last_color = None
 
     def update_ping_indicator(self, color):
@@ -46,3 +56,37 @@ def test_handle_ping_result_escapes_html():
     # Ensure the output has been escaped (no raw '<script>' should be present)
     assert '<script>' not in app.ping_output_view.inserted_html
     assert '&lt;script&gt;' in app.ping_output_view.inserted_html
+
+
+def test_ping_results_batched_while_flush_pending():
+    app = DummyApp()
+    # a flush is already scheduled, so new results should be buffered
+    app._ping_flush_pending = True
+
+    KeyMapperApp.handle_ping_result(app, 'green', 'first')
+    KeyMapperApp.handle_ping_result(app, 'red', 'second')
+    assert app.ping_output_view.inserted_html is None
+    assert len(app._ping_html_buffer) == 2
+
+    app._flush_ping_html()
+    html_out = app.ping_output_view.inserted_html
+    assert 'first' in html_out and 'second' in html_out
+    assert app._ping_html_buffer == []
+    assert app._ping_flush_pending is False
+
+
+def test_ping_results_held_while_log_tab_hidden():
+    app = DummyApp()
+    tab_visible = [False]
+    app._ping_log_tab = type('T', (), {'isVisible': lambda self: tab_visible[0]})()
+
+    KeyMapperApp.handle_ping_result(app, 'green', 'hidden result')
+    # indicator still updates, but the log view is left alone
+    assert app._last_color == 'green'
+    assert app.ping_output_view.inserted_html is None
+    assert len(app._ping_html_buffer) == 1
+
+    tab_visible[0] = True
+    app._flush_ping_html()
+    assert 'hidden result' in app.ping_output_view.inserted_html
+    assert app._ping_html_buffer == []
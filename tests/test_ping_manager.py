@@ -0,0 +1,121 @@
+import asyncio
+import importlib
+import sys
+import threading
+import time
+
+from PyQt6.QtCore import Qt
+
+threads = importlib.import_module('s_mapper.threads')
+
+
+def _wait_for(pred, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return pred()
+
+
+def _start_manager():
+    pm = threads.PingManager()
+    results = []
+    pm.ping_html.connect(lambda color, html: results.append((color, html)),
+                         type=Qt.ConnectionType.DirectConnection)
+    pm.start()
+    assert pm._ready.wait(2.0)
+    return pm, results
+
+
+def test_ping_manager_does_not_block_before_loop_runs():
+    pm = threads.PingManager()
+    started = time.monotonic()
+    # not started yet: refuse at once so the GUI can fall back to PingThread
+    assert pm.ping('10.0.0.1') is False
+    assert time.monotonic() - started < 0.1
+
+
+def _fake_ping(monkeypatch, script):
+    # stand in for the system ping with a python one-liner
+    monkeypatch.setattr(threads, '_ping_command', lambda ip: [sys.executable, '-c', script])
+
+
+def test_ping_manager_caps_concurrent_pings(monkeypatch):
+    pm, _ = _start_manager()
+    lock = threading.Lock()
+    active = {'now': 0, 'peak': 0, 'done': 0}
+
+    async def fake_run_ping(ip):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        await asyncio.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+            active['done'] += 1
+
+    monkeypatch.setattr(pm, '_run_ping', fake_run_ping)
+    try:
+        for i in range(8):
+            assert pm.ping(f'10.0.0.{i}')
+        assert _wait_for(lambda: active['done'] == 8)
+        assert active['peak'] == pm.MAX_CONCURRENT
+    finally:
+        pm.stop()
+        assert pm.wait(2000)
+
+
+def test_ping_manager_emits_escaped_html_with_color(monkeypatch):
+    _fake_ping(monkeypatch, "print('Reply <b>ok</b>\\nPackets: Sent = 4, Received = 4, Lost = 0 (0% loss)')")
+    pm, results = _start_manager()
+    try:
+        assert pm.ping('10.0.0.1')
+        assert _wait_for(lambda: results)
+    finally:
+        pm.stop()
+        assert pm.wait(2000)
+
+    color, html = results[0]
+    assert color == 'green'
+    assert 'Ping results for 10.0.0.1' in html
+    assert 'Reply &lt;b&gt;ok&lt;/b&gt;' in html
+    assert '\r' not in html
+
+
+def test_ping_manager_reports_timeout(monkeypatch):
+    _fake_ping(monkeypatch, 'import time; time.sleep(30)')
+    monkeypatch.setattr(threads.PingManager, 'PING_TIMEOUT', 0.2)
+    pm, results = _start_manager()
+    try:
+        assert pm.ping('10.0.0.1')
+        assert _wait_for(lambda: results)
+    finally:
+        pm.stop()
+        assert pm.wait(2000)
+
+    color, html = results[0]
+    assert color == 'red'
+    assert 'timed out' in html
+
+
+def test_ping_manager_stop_kills_running_ping(monkeypatch):
+    _fake_ping(monkeypatch, 'import time; time.sleep(30)')
+    pm, results = _start_manager()
+    assert pm.ping('10.0.0.1')
+    assert _wait_for(lambda: pm._procs)
+    proc = next(iter(pm._procs))
+    killed = []
+    kill = proc.kill
+    proc.kill = lambda: (killed.append(True), kill())
+
+    started = time.monotonic()
+    pm.stop()
+    assert pm.wait(2000)
+    assert time.monotonic() - started < 2.0
+    # the subprocess was killed rather than left running, and nothing was
+    # reported for the cancelled ping
+    assert killed
+    assert results == []
+    # a stopped manager refuses new work
+    assert pm.ping('10.0.0.2') is False
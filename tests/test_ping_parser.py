@@ -15,3 +15,28 @@ def test_parse_ping_output(output, expected_pct, expected_color):
     pct, color = parse_ping_output(output)
     assert pct == expected_pct
     assert color == expected_color
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("127.0.0.1", True),
+    ("255.255.255.255", True),
+    ("0.0.0.0", True),
+    ("256.1.1.1", False),
+    ("1.2.3", False),
+    ("1.2.3.4.5", False),
+    ("1..3.4", False),
+    ("not.an.ip", False),
+    ("1.2.3.4\n", False),
+    ("", False),
+])
+def test_is_ipv4(text, expected):
+    from s_mapper.utils import is_ipv4
+    assert is_ipv4(text) is expected
+
+
+def test_format_ping_html_escapes_output():
+    from s_mapper.utils import format_ping_html
+    frag = format_ping_html('10.0.0.1', 'red', 'a <b> & c')
+    assert '10.0.0.1' in frag
+    assert 'color: red' in frag
+    assert '&lt;b&gt; &amp; c' in frag